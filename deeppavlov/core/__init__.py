@@ -1,3 +0,0 @@
-from deeppavlov.core.vocab import VocabComponent
-from deeppavlov.core.vocab import BowComponent
-from deeppavlov.core.emb import W2VEmbComponent
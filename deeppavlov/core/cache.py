@@ -0,0 +1,169 @@
+"""
+Content-hashed on-disk cache of dataset providers.
+
+Building a provider means reading the dataset with a ``DatasetReader`` and deriving the provider view of it,
+which is repeated on every start of a pipeline. The cache stores the resulting provider data and attributes
+in ``<cache_dir>/<key>/``: ``meta.json`` with the attributes and one JSON array of samples per data type.
+Tuples and numpy arrays are tagged, so the restored provider is equal to the built one. No pickle is used.
+
+The key is a sha1 of the reader and provider classes, the code of their modules and of the modules of the same
+package they import, the provider config and the contents of the dataset files (``DatasetReader.sources``),
+of the other files the provider reads (``DatasetProvider.cache_sources``) and of the files referenced in the
+config, so any change of them invalidates the cache.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import os
+import shutil
+import sys
+
+import numpy as np
+
+from deeppavlov.core.data import DatasetProvider
+
+logger = logging.getLogger(__name__)
+
+META_FILE = 'meta.json'
+
+# Attributes of DatasetProvider which are restored from the seed or the config, not from the cache
+_SKIP_ATTRS = ('random_state', 'bucket_boundaries', 'sort_window')
+
+
+def _update_with_file(sha, path):
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+
+
+def _module_dependencies(module_names):
+    """
+    Return names of the given modules and of all modules of the same top-level packages which they import,
+    directly or through each other.
+    """
+    found = set()
+    stack = list(module_names)
+    while stack:
+        name = stack.pop()
+        module = sys.modules.get(name)
+        if name in found or module is None:
+            continue
+        found.add(name)
+        package = name.split('.')[0]
+        for value in vars(module).values():
+            dependency = value.__name__ if inspect.ismodule(value) else getattr(value, '__module__', None)
+            if isinstance(dependency, str) and dependency.split('.')[0] == package and dependency not in found:
+                stack.append(dependency)
+    return sorted(found)
+
+
+def cache_key(reader_cls, provider_cls, config, sources=()):
+    """
+    Args:
+        reader_cls: ``DatasetReader`` class
+        provider_cls: ``DatasetProvider`` class
+        config (dict): config values which affect the provider data, strings which are paths of existing
+            files are replaced with the contents of the files
+        sources: paths of the files the dataset and the provider are built from
+    Returns:
+        hex digest of the key
+    """
+    sha = hashlib.sha1()
+    for cls in (reader_cls, provider_cls):
+        sha.update(("%s.%s\n" % (cls.__module__, cls.__name__)).encode('utf8'))
+    for name in _module_dependencies([reader_cls.__module__, provider_cls.__module__]):
+        source_file = getattr(sys.modules[name], '__file__', None)
+        if source_file is not None and source_file.endswith('.py'):
+            sha.update(("\n%s\n" % name).encode('utf8'))
+            _update_with_file(sha, source_file)
+    sha.update(json.dumps(config, sort_keys=True, default=str).encode('utf8'))
+    referenced = [v for v in config.values() if isinstance(v, str) and os.path.isfile(v)]
+    for path in list(sources) + referenced:
+        sha.update(("\n%s\n" % path).encode('utf8'))
+        if os.path.isfile(path):
+            _update_with_file(sha, path)
+    return sha.hexdigest()
+
+
+def _encode(obj):
+    if isinstance(obj, tuple):
+        return {"__tuple__": [_encode(v) for v in obj]}
+    if isinstance(obj, list):
+        return [_encode(v) for v in obj]
+    if isinstance(obj, dict):
+        for k in obj:
+            if not isinstance(k, str):
+                raise TypeError("Can't cache dict with %s key" % type(k).__name__)
+        return {k: _encode(v) for k, v in obj.items()}
+    if isinstance(obj, np.ndarray):
+        return {"__ndarray__": obj.tolist(), "dtype": obj.dtype.str}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    raise TypeError("Can't cache value of type %s" % type(obj).__name__)
+
+
+def _decode_hook(obj):
+    if "__tuple__" in obj:
+        return tuple(obj["__tuple__"])
+    if "__ndarray__" in obj:
+        return np.array(obj["__ndarray__"], dtype=obj["dtype"])
+    return obj
+
+
+def save_provider(path, provider):
+    """
+    Save data and attributes of the provider to the directory ``path``. The directory is written under
+    a temporary name and then renamed, so readers never see a partially written cache.
+    """
+    data_types = list(provider.data)
+    attrs = {}
+    for name, value in vars(provider).items():
+        if name in _SKIP_ATTRS or name == 'data':
+            continue
+        same_data = [data_type for data_type in data_types if provider.data[data_type] is value]
+        attrs[name] = {"__data__": same_data[0]} if same_data else _encode(value)
+
+    tmp_path = path + '.tmp%s' % os.getpid()
+    os.makedirs(tmp_path, exist_ok=True)
+    try:
+        for data_type in data_types:
+            with open(os.path.join(tmp_path, data_type + '.json'), 'w', encoding='utf8') as f:
+                json.dump(_encode(provider.data[data_type]), f, ensure_ascii=False)
+        with open(os.path.join(tmp_path, META_FILE), 'w', encoding='utf8') as f:
+            json.dump({"data_types": data_types, "attrs": attrs}, f, ensure_ascii=False)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.isdir(tmp_path):
+            shutil.rmtree(tmp_path)
+
+
+def load_provider(path, provider_cls, seed):
+    """
+    Restore a provider saved with ``save_provider`` without calling the ``__init__`` of ``provider_cls``.
+    Returns:
+        provider or None if there is no cache in ``path``
+    """
+    if not os.path.isfile(os.path.join(path, META_FILE)):
+        return None
+    with open(os.path.join(path, META_FILE), encoding='utf8') as f:
+        meta = json.load(f, object_hook=_decode_hook)
+
+    data = {}
+    for data_type in meta["data_types"]:
+        with open(os.path.join(path, data_type + '.json'), encoding='utf8') as f:
+            data[data_type] = json.load(f, object_hook=_decode_hook)
+
+    provider = provider_cls.__new__(provider_cls)
+    DatasetProvider.__init__(provider, {}, seed)
+    for name, value in meta["attrs"].items():
+        if isinstance(value, dict) and "__data__" in value:
+            value = data[value["__data__"]]
+        setattr(provider, name, value)
+    provider.data = data
+    return provider
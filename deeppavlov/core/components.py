@@ -1,13 +1,36 @@
 from deeppavlov.core.registrable import Registrable
 from deeppavlov.core.data import DatasetProvider
+from deeppavlov.core.cache import cache_key, load_provider, save_provider
+from deeppavlov.core.profiling import ComponentProfiler
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue, Full
 import copy
 import importlib
 import logging
+import os
+import threading
+import time
 from pyhocon import ConfigFactory
 from overrides import overrides
 
 logger = logging.getLogger(__name__)
 
+# Modules with built-in components, imported only when a component is requested by name
+for _name, _module in [("vocab", "deeppavlov.core.vocab"),
+                       ("bow", "deeppavlov.core.vocab"),
+                       ("w2v", "deeppavlov.core.emb"),
+                       ("tokenizer.chars", "deeppavlov.preprocessing.tokenizers"),
+                       ("tokenizer.spacy", "deeppavlov.preprocessing.tokenizers"),
+                       ("tokenizer.nltk", "deeppavlov.preprocessing.tokenizers"),
+                       ("provider.ner.dstc2", "deeppavlov.data.dstc2"),
+                       ("provider.dialog.dstc2", "deeppavlov.data.dstc2"),
+                       ("provider.intents.dstc2", "deeppavlov.data.dstc2"),
+                       ("ner", "deeppavlov.ner.ner"),
+                       ("ner.gazetteer", "deeppavlov.ner.gazetteer"),
+                       ("intents", "deeppavlov.intents.intents"),
+                       ("hcn", "deeppavlov.skills.hcn")]:
+    Registrable.register_lazy(_name, _module)
+
 
 class Component(Registrable):
     def __init__(self, config):
@@ -63,9 +86,27 @@ class Component(Registrable):
     def set_output(self, name, value, smem):
         self._set_output_by_idx(self.local_output_names.index(name), value, smem)
 
+    def get_batch_input(self, name, shared_mems):
+        idx = self.local_input_names.index(name)
+        return [self._get_input_by_idx(idx, smem) for smem in shared_mems]
+
+    def set_batch_output(self, name, values, shared_mems):
+        idx = self.local_output_names.index(name)
+        for value, smem in zip(values, shared_mems):
+            self._set_output_by_idx(idx, value, smem)
+
     def forward(self, shared_mem, add_local_mem=False):
         pass
 
+    def forward_batch(self, shared_mems, add_local_mem=False):
+        """
+        Process several requests at once. Each element of ``shared_mems`` is a shared memory dict of a single
+        request. By default requests are processed one by one, components which can vectorize their work
+        override this method and operate on whole columns (see ``get_batch_input`` and ``set_batch_output``).
+        """
+        for smem in shared_mems:
+            self.forward(smem, add_local_mem=add_local_mem)
+
     def train(self, shared_mem, add_local_mem=False):
         pass
 
@@ -111,14 +152,47 @@ class DatasetProviderWrapper(Component):
         self.reader_cls = load_cls(self.config["reader"])
 
         self.provider_cls = self.config["provider"]
-
-        self.provider = self.provider_cls(self._read_data(), self.seed)
+        self.cache_dir = self.config["cache_dir"] if "cache_dir" in self.config else None
+        # Ask the reader for lazily read data instead of a list in memory
+        self.stream = self.config["stream"] if "stream" in self.config else False
+        if self.stream and not self.provider_cls.supports_stream:
+            raise ValueError("%s can't read a data stream, remove \"stream\" from its config"
+                             % self.provider_cls.__name__)
+
+        self.provider = self._build_provider()
+        if "bucket_boundaries" in self.config or "sort_window" in self.config:
+            self.provider.set_bucketing(
+                self.config["bucket_boundaries"] if "bucket_boundaries" in self.config else None,
+                self.config["sort_window"] if "sort_window" in self.config else None)
         self.generator = self.provider.batch_generator(self.batch_size, self.data_type)
         self.current_epoch = 0
         self.batch_num = 0
 
     def _read_data(self):
-        return self.reader_cls().read(self.data_path) if self.data_path is not None else self.reader_cls.read()
+        kwargs = {"stream": True} if self.stream else {}
+        if self.data_path is not None:
+            return self.reader_cls().read(self.data_path, **kwargs)
+        return self.reader_cls.read(**kwargs)
+
+    def _build_provider(self):
+        if self.cache_dir is None or self.stream:
+            return self.provider_cls(self._read_data(), self.seed)
+
+        sources = list(self.reader_cls.sources(self.data_path)) + list(self.provider_cls.cache_sources())
+        key = cache_key(self.reader_cls, self.provider_cls, {"data_path": self.data_path, "seed": self.seed},
+                        sources)
+        path = os.path.join(self.cache_dir, key)
+        provider = load_provider(path, self.provider_cls, self.seed)
+        if provider is not None:
+            logger.info("Provider loaded from cache %s" % path)
+            return provider
+
+        provider = self.provider_cls(self._read_data(), self.seed)
+        try:
+            save_provider(path, provider)
+        except (TypeError, OSError) as e:
+            logger.warning("Provider is not cached: %s" % e)
+        return provider
 
     @overrides
     def forward(self, shared_mem, add_local_mem=False):
@@ -149,6 +223,17 @@ class Pipeline(Component):
 
         self._setup = {}
 
+        self.num_workers = int(self.config["num_workers"]) if "num_workers" in self.config else 1
+        self._executor = None
+
+        self._plan = None
+
+        self.hooks = []
+        self.profiler = None
+        if "profile" in self.config and self.config["profile"]:
+            self.profiler = ComponentProfiler()
+            self.add_hook(self.profiler)
+
     def _build_pipeline(self):
         for component_config in self.config['pipe']:
             self.pipeline.append(init_component(component_config))
@@ -164,16 +249,61 @@ class Pipeline(Component):
                 pipe.append(c)
         self.pipeline = pipe
 
+    def compile(self, components={}):
+        """
+        Prepare and set up the pipeline once and return its execution plan: a tuple of stages, each stage
+        is a tuple of enabled components which may run concurrently. Stages have to be run in order.
+        Subsequent calls return the cached plan.
+        """
+        if self._plan is None:
+            self.setup(components)
+        return self._plan
+
+    def add_hook(self, hook):
+        """Register a ``PipelineHook`` for this pipeline and all nested pipelines"""
+        self.hooks.append(hook)
+        for c in self.pipeline:
+            if isinstance(c, Pipeline):
+                c.add_hook(hook)
+
+    def _call(self, c, method, mem, add_local_mem=False):
+        if not self.hooks:
+            return getattr(c, method)(mem, add_local_mem=add_local_mem)
+        for hook in self.hooks:
+            hook.before(c, method, mem)
+        start = time.perf_counter()
+        result = getattr(c, method)(mem, add_local_mem=add_local_mem)
+        elapsed = time.perf_counter() - start
+        for hook in self.hooks:
+            hook.after(c, method, mem, elapsed)
+        return result
+
+    def _save_profile(self):
+        if self.profiler is not None and "profile_to" in self.config:
+            self.profiler.save(self.config["profile_to"])
+
+    def _run_stage(self, stage, method, mem, add_local_mem=False):
+        if self._executor is None or len(stage) == 1:
+            for c in stage:
+                self._call(c, method, mem, add_local_mem=add_local_mem)
+        else:
+            futures = [self._executor.submit(self._call, c, method, mem, add_local_mem=add_local_mem) for c in stage]
+            for f in futures:
+                f.result()
+
     @overrides
     def forward(self, shared_mem, add_local_mem=False, train=False):
-        self.prepare_pipeline()
-        self.setup()
-        for c in self.pipeline:
-            if not c.disable:
-                c.forward(shared_mem, add_local_mem=add_local_mem)
+        for stage in self.compile():
+            self._run_stage(stage, "forward", shared_mem, add_local_mem=add_local_mem)
+
+    @overrides
+    def forward_batch(self, shared_mems, add_local_mem=False):
+        for stage in self.compile():
+            self._run_stage(stage, "forward_batch", shared_mems, add_local_mem=add_local_mem)
 
     @overrides
     def setup(self, components={}):
+        self.prepare_pipeline()
         comps = {}
         for c in self.pipeline:
             if "id" in c.config:
@@ -181,6 +311,14 @@ class Pipeline(Component):
         for c in self.pipeline:
             c.setup({**components, **comps})
 
+        enabled = [c for c in self.pipeline if not c.disable]
+        if self.num_workers > 1:
+            self._plan = build_stages(enabled)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.num_workers)
+        else:
+            self._plan = tuple((c,) for c in enabled)
+
     @overrides
     def train(self, shared_mem, add_local_mem=False):
         raise NotImplementedError
@@ -199,6 +337,10 @@ class Pipeline(Component):
     def shutdown(self):
         for c in self.pipeline:
             c.shutdown()
+        self._save_profile()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
 
 
 class TrainPipeline(Pipeline):
@@ -207,28 +349,71 @@ class TrainPipeline(Pipeline):
 
     @overrides
     def train(self, shared_mem, add_local_mem=False):
-        self.prepare_pipeline()
         self.setup()
 
         n = int(self.config["train"]["num_epochs"])
-        local_mem = {}
-        for e in range(n):
-            logger.info("Start epoch %s" % e)
-            local_mem["epoch"] = e
-            pipe = self.pipeline[:-1]
-            trained = self.pipeline[-1]
-            if len(pipe) > 0:
+        prefetch = int(self.config["train"]["prefetch"]) if "prefetch" in self.config["train"] else 0
+        pipe = self.pipeline[:-1]
+        trained = self.pipeline[-1]
+        if prefetch > 0 and len(pipe) > 0:
+            self._train_prefetched(pipe, trained, n, prefetch, add_local_mem)
+        else:
+            local_mem = {}
+            for e in range(n):
+                logger.info("Start epoch %s" % e)
+                local_mem["epoch"] = e
+                if len(pipe) > 0:
+                    try:
+                        while True:
+                            for c in pipe:
+                                self._call(c, "forward", local_mem, add_local_mem=add_local_mem)
+                            self._call(trained, "train", local_mem, add_local_mem=add_local_mem)
+                    except StopIteration:
+                        logger.info("End of epoch %s" % e)
+                else:
+                    self._call(trained, "train", local_mem, add_local_mem=add_local_mem)
+                    logger.info("End of epoch %s" % e)
+        self.save()
+        self._save_profile()
+
+    def _train_prefetched(self, pipe, trained, num_epochs, prefetch, add_local_mem):
+        """
+        Run the preprocessing components in a background thread, which keeps up to ``prefetch`` ready
+        batches in a queue, while the trained component is trained on the batches prepared before.
+        """
+        queue = Queue(maxsize=prefetch)
+        stop = threading.Event()
+        producer = threading.Thread(target=self._prefetch, args=(pipe, num_epochs, queue, stop, add_local_mem),
+                                    daemon=True)
+        producer.start()
+        try:
+            for e in range(num_epochs):
+                logger.info("Start epoch %s" % e)
+                while True:
+                    item = queue.get()
+                    if item is _END_OF_EPOCH:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    self._call(trained, "train", item, add_local_mem=add_local_mem)
+                logger.info("End of epoch %s" % e)
+        finally:
+            stop.set()
+            producer.join()
+
+    def _prefetch(self, pipe, num_epochs, queue, stop, add_local_mem):
+        try:
+            for e in range(num_epochs):
                 try:
-                    while True:
+                    while not stop.is_set():
+                        mem = {"epoch": e}
                         for c in pipe:
-                            c.forward(local_mem, add_local_mem=add_local_mem)
-                        trained.train(local_mem, add_local_mem=add_local_mem)
+                            self._call(c, "forward", mem, add_local_mem=add_local_mem)
+                        _put(queue, mem, stop)
                 except StopIteration:
-                    logger.info("End of epoch %s" % e)
-            else:
-                trained.train(local_mem, add_local_mem=add_local_mem)
-                logger.info("End of epoch %s" % e)
-        self.save()
+                    _put(queue, _END_OF_EPOCH, stop)
+        except Exception as e:
+            _put(queue, e, stop)
 
     def get_trained_component(self):
         cmp = self.pipeline[-1]
@@ -241,6 +426,50 @@ class TrainPipeline(Pipeline):
         return cmp
 
 
+_END_OF_EPOCH = object()
+
+
+def _put(queue, item, stop):
+    # Do not block forever if the consumer has stopped
+    while not stop.is_set():
+        try:
+            queue.put(item, timeout=0.1)
+            return
+        except Full:
+            pass
+
+
+def _depends(before, after):
+    # Nested pipelines read and write keys which are not declared in their config
+    if isinstance(before, Pipeline) or isinstance(after, Pipeline):
+        return True
+    before_out = set(before.outputs)
+    return bool(before_out & set(after.inputs)
+                or before_out & set(after.outputs)
+                or set(before.inputs) & set(after.outputs))
+
+
+def build_stages(components):
+    """
+    Group components into stages using their declared ``in``/``out`` keys. A component is placed into the
+    stage following the last stage with a component it depends on, i.e. one which produces its inputs,
+    writes the same outputs or reads a key the component overwrites. Components of the same stage are
+    independent of each other.
+    """
+    levels = []
+    for j, c in enumerate(components):
+        level = 0
+        for i in range(j):
+            if _depends(components[i], c):
+                level = max(level, levels[i] + 1)
+        levels.append(level)
+
+    stages = [[] for _ in range(max(levels) + 1)] if levels else []
+    for c, level in zip(components, levels):
+        stages[level].append(c)
+    return tuple(tuple(stage) for stage in stages)
+
+
 def read_configuration(file):
     config = ConfigFactory.parse_file(file)
     return config
@@ -1,4 +1,5 @@
 from deeppavlov.core.registrable import Registrable
+from bisect import bisect_left
 import random
 
 
@@ -13,11 +14,30 @@ class DatasetReader:
         """
         raise NotImplementedError
 
+    @staticmethod
+    def sources(data_path=None):
+        """
+        Return paths of the files which ``read`` reads the data from. Their contents are a part of the key of
+        the provider cache.
+        """
+        return []
+
 
 class DatasetProvider(Registrable):
+    # Whether the provider accepts lazily read data parts (``DatasetReader.read(..., stream=True)``) instead of lists
+    supports_stream = False
+
     def split(self, *args, **kwargs):
         pass
 
+    @classmethod
+    def cache_sources(cls):
+        """
+        Return paths of the files other than the dataset which the provider reads. Their contents are a part
+        of the key of the provider cache.
+        """
+        return []
+
     def __init__(self, data, seed, *args, **kwargs):
         r""" Dataset takes a dict with fields 'train', 'test', 'valid'. A list of samples (pairs x, y) is stored
         in each field.
@@ -32,6 +52,9 @@ class DatasetProvider(Registrable):
         self.random_state = random.getstate()
         random.setstate(rs)
 
+        self.bucket_boundaries = None
+        self.sort_window = None
+
         self.train = data.get('train', [])
         self.valid = data.get('valid', [])
         self.test = data.get('test', [])
@@ -58,15 +81,56 @@ class DatasetProvider(Registrable):
             data = self.data[data_type]
             data_len = len(data)
             order = list(range(data_len))
+            self._shuffle(order)
+
+            if self.bucket_boundaries or self.sort_window:
+                batches = self._bucket_batches(data, order, batch_size)
+                self._shuffle(batches)
+            else:
+                batches = [order[i*batch_size:(i+1)*batch_size] for i in range((data_len - 1) // batch_size + 1)]
+
+            for batch in batches:
+                yield list(zip(*[data[o] for o in batch]))
 
-            rs = random.getstate()
-            random.setstate(self.random_state)
-            random.shuffle(order)
-            self.random_state = random.getstate()
-            random.setstate(rs)
+    def set_bucketing(self, bucket_boundaries=None, sort_window=None):
+        r"""Make ``batch_generator`` group samples of similar length into the same batches, so that less padding
+        is needed. Batches are still shuffled with ``random_state``, so the order of batches is deterministic.
+        Args:
+            bucket_boundaries (list): sorted sample lengths, samples with lengths in
+                (bucket_boundaries[i-1], bucket_boundaries[i]] go to the i-th bucket. Longer samples go to the last
+                bucket
+            sort_window (int): if no boundaries are given, the shuffled data is split into windows of
+                sort_window * batch_size samples, which are sorted by sample length before slicing into batches
+        """
+        self.bucket_boundaries = sorted(bucket_boundaries) if bucket_boundaries else None
+        self.sort_window = sort_window
+
+    @staticmethod
+    def sample_length(sample):
+        r"""Length of the sample used for bucketing: number of tokens of the first feature"""
+        x = sample[0]
+        if isinstance(x, str):
+            return len(x.split())
+        return len(x)
+
+    def _shuffle(self, items):
+        rs = random.getstate()
+        random.setstate(self.random_state)
+        random.shuffle(items)
+        self.random_state = random.getstate()
+        random.setstate(rs)
+
+    def _bucket_batches(self, data, order, batch_size):
+        lengths = {o: self.sample_length(data[o]) for o in order}
+        if self.bucket_boundaries:
+            buckets = [[] for _ in range(len(self.bucket_boundaries) + 1)]
+            for o in order:
+                buckets[bisect_left(self.bucket_boundaries, lengths[o])].append(o)
+        else:
+            window = self.sort_window * batch_size
+            buckets = [sorted(order[i:i+window], key=lengths.get) for i in range(0, len(order), window)]
 
-            for i in range((data_len - 1) // batch_size + 1):
-                yield list(zip(*[data[o] for o in order[i*batch_size:(i+1)*batch_size]]))
+        return [bucket[i:i+batch_size] for bucket in buckets for i in range(0, len(bucket), batch_size)]
 
     def iter_all(self, data_type='train'):
         r"""Iterate through all data. It can be used for building dictionary or
@@ -1,10 +1,12 @@
 from deeppavlov.core.components import Component
 from deeppavlov.core.registrable import Registrable
+from deeppavlov.core.emb_store import EmbeddingStore, copy_embeddings, save_embeddings
 from overrides import overrides
 import logging
 from gensim.models import word2vec
 import numpy as np
 import os
+from itertools import chain
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +19,10 @@ class W2VEmbComponent(Component):
         self.local_output_names = ['emb']
         self.corpus = self.config["corpus"] if "corpus" in self.config else None
         self.dim = self.config["dim"] if "dim" in self.config else 300
-        self.emb = UtteranceEmbed(self.dim)
+        # Save and load embeddings as a memory-mapped store instead of a gensim model
+        self.mmap = self.config["mmap"] if "mmap" in self.config else False
+        self.mmap_dtype = self.config["mmap_dtype"] if "mmap_dtype" in self.config else "float32"
+        self.emb = UtteranceEmbed(self.dim, mmap=self.mmap, mmap_dtype=self.mmap_dtype)
 
     @overrides
     def forward(self, smem, add_local_mem=False):
@@ -26,6 +31,13 @@ class W2VEmbComponent(Component):
             result = self.emb.infer(tokens)
             self.set_output("emb", result, smem)
 
+    @overrides
+    def forward_batch(self, smems, add_local_mem=False):
+        if len(self.inputs) > 0 and len(self.outputs) > 0:
+            tokens_batch = self.get_batch_input("tokens", smems)
+            result = self.emb.infer_batch(tokens_batch)
+            self.set_batch_output("emb", result, smems)
+
     @overrides
     def train(self, smem, add_local_mem=False):
         self.emb.train(self.corpus)
@@ -34,7 +46,6 @@ class W2VEmbComponent(Component):
     def save(self):
         if "save_to" in self.config:
             path = self.config["save_to"]
-            import os
             os.makedirs(os.path.dirname(path), exist_ok=True)
             self.emb.save(path)
 
@@ -51,9 +62,11 @@ class W2VEmbComponent(Component):
 
 
 class UtteranceEmbed():
-    def __init__(self, dim=300):
+    def __init__(self, dim=300, mmap=False, mmap_dtype="float32"):
         self.dim = dim
         self.model = None
+        self.mmap = mmap
+        self.mmap_dtype = mmap_dtype
 
     def _encode(self, tokens):
         embs = [self.model[word] for word in tokens if word and word in self.model]
@@ -73,10 +86,31 @@ class UtteranceEmbed():
     def infer(self, tokens):
         return self._encode(tokens)
 
+    def infer_batch(self, tokens_batch):
+        """Average embeddings for a batch of utterances with a single lookup of all known words"""
+        words_batch = [[word for word in tokens if word and word in self.model] for tokens in tokens_batch]
+        lengths = np.array([len(words) for words in words_batch], dtype=np.int64)
+        result = np.zeros([len(tokens_batch), self.dim], np.float32)
+        nonempty = lengths > 0
+        if np.any(nonempty):
+            embs = self.model[list(chain.from_iterable(words_batch))]
+            starts = np.cumsum(lengths) - lengths
+            result[nonempty] = np.add.reduceat(embs, starts[nonempty], axis=0) / lengths[nonempty, np.newaxis]
+        return result
+
     def load(self, path):
         print(':: model loaded from path %s' % path)
-        self.model = word2vec.Word2Vec.load(path)
+        if self.mmap:
+            self.model = EmbeddingStore(path)
+        else:
+            self.model = word2vec.Word2Vec.load(path)
 
     def save(self, path):
-        self.model.save(path)
+        if isinstance(self.model, EmbeddingStore):
+            # The model was loaded from a store, its files are copied as they are
+            copy_embeddings(self.model.path, path)
+        elif self.mmap:
+            save_embeddings(path, self.model.wv.index2word, self.model.wv.syn0, dtype=self.mmap_dtype)
+        else:
+            self.model.save(path)
         print(':: model saved to path %s' % path)
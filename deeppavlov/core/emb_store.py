@@ -0,0 +1,181 @@
+"""
+Read-only on-disk embeddings store.
+
+Embeddings are kept in two files: ``<path>.vocab`` with one token per line and ``<path>.npy`` with a
+float32 (or float16) matrix whose i-th row is the vector of the i-th token. The matrix is opened with
+``np.load(..., mmap_mode='r')``, so the OS page cache shares a single copy of it between all processes
+which use the same file and only the touched rows are read from disk.
+
+A store converted from a fastText model also has the character n-gram vectors of the model in
+``<path>.ngrams.vocab``/``<path>.ngrams.npy`` and the n-gram lengths in ``<path>.ngrams.json``. Vectors of
+out-of-vocabulary tokens are then built from their n-grams, as gensim's fastText wrapper does.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+VOCAB_SUFFIX = '.vocab'
+MATRIX_SUFFIX = '.npy'
+NGRAMS_SUFFIX = '.ngrams'
+
+
+def save_embeddings(path, tokens, matrix, dtype=np.float32):
+    """
+    Write embeddings in the store format. Files are written under temporary names and then renamed,
+    so concurrent readers never see a partially written store.
+    Args:
+        path: path prefix of the store files
+        tokens: list of tokens
+        matrix: array [len(tokens), dim]
+        dtype: dtype of the stored matrix, float32 or float16
+    """
+    matrix = np.asarray(matrix, dtype=dtype)
+    if matrix.ndim != 2 or matrix.shape[0] != len(tokens):
+        raise ValueError("Embeddings matrix of shape %s does not match %s tokens" % (matrix.shape, len(tokens)))
+    dirname = os.path.dirname(path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+
+    tmp_matrix_path = path + '.tmp' + MATRIX_SUFFIX
+    np.save(tmp_matrix_path, matrix)
+    tmp_vocab_path = path + '.tmp' + VOCAB_SUFFIX
+    with open(tmp_vocab_path, 'w', encoding='utf8') as f:
+        for token in tokens:
+            f.write(token + '\n')
+    os.replace(tmp_matrix_path, path + MATRIX_SUFFIX)
+    os.replace(tmp_vocab_path, path + VOCAB_SUFFIX)
+
+
+def copy_embeddings(src, dst):
+    """
+    Copy the store files of ``src`` (with the n-gram vectors if there are any) to ``dst``. Files are copied
+    under temporary names and then renamed, as ``save_embeddings`` writes them.
+    """
+    if os.path.abspath(src) == os.path.abspath(dst):
+        return
+    dirname = os.path.dirname(dst)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    suffixes = [MATRIX_SUFFIX, VOCAB_SUFFIX]
+    if EmbeddingStore.exists(src, ngrams=True):
+        suffixes += [NGRAMS_SUFFIX + MATRIX_SUFFIX, NGRAMS_SUFFIX + VOCAB_SUFFIX, NGRAMS_SUFFIX + '.json']
+    for suffix in suffixes:
+        shutil.copyfile(src + suffix, dst + '.tmp' + suffix)
+    for suffix in suffixes:
+        os.replace(dst + '.tmp' + suffix, dst + suffix)
+
+
+def save_ngrams(path, ngrams, matrix, min_n, max_n, dtype=np.float32):
+    """
+    Write character n-gram vectors of a fastText model next to the store at ``path``.
+    Args:
+        path: path prefix of the store files
+        ngrams: list of n-grams
+        matrix: array [len(ngrams), dim]
+        min_n, max_n: range of n-gram lengths of the model
+        dtype: dtype of the stored matrix, float32 or float16
+    """
+    save_embeddings(path + NGRAMS_SUFFIX, ngrams, matrix, dtype)
+    # The lengths file is written last, the n-grams part exists only when it is present
+    tmp_meta_path = path + NGRAMS_SUFFIX + '.tmp.json'
+    with open(tmp_meta_path, 'w', encoding='utf8') as f:
+        json.dump({"min_n": min_n, "max_n": max_n}, f)
+    os.replace(tmp_meta_path, path + NGRAMS_SUFFIX + '.json')
+
+
+def char_ngrams(token, min_n, max_n):
+    """Character n-grams of the token wrapped in '<' and '>', in the order of fastText"""
+    extended = '<' + token + '>'
+    ngrams = []
+    for n in range(min_n, min(len(extended), max_n) + 1):
+        for i in range(len(extended) - n + 1):
+            ngrams.append(extended[i:i + n])
+    return ngrams
+
+
+class EmbeddingStore:
+    """
+    Memory-mapped embeddings. Supports the subset of the gensim model interface used in the code base:
+    ``token in store``, ``store[token]`` and ``store[list_of_tokens]`` (KeyError for unknown tokens).
+    With n-gram vectors a token is unknown only if none of its n-grams are known.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path + VOCAB_SUFFIX, encoding='utf8') as f:
+            self._t2i = {line.rstrip('\n'): i for i, line in enumerate(f)}
+        self.matrix = np.load(path + MATRIX_SUFFIX, mmap_mode='r')
+        self.dim = self.matrix.shape[1]
+
+        self.ngrams = None
+        if EmbeddingStore.exists(path, ngrams=True):
+            with open(path + NGRAMS_SUFFIX + '.json', encoding='utf8') as f:
+                meta = json.load(f)
+            self.min_n, self.max_n = meta["min_n"], meta["max_n"]
+            self.ngrams = EmbeddingStore(path + NGRAMS_SUFFIX)
+
+    @staticmethod
+    def exists(path, ngrams=False):
+        """Check the store files, with ``ngrams`` also the n-gram vectors of a fastText model"""
+        if not (os.path.isfile(path + VOCAB_SUFFIX) and os.path.isfile(path + MATRIX_SUFFIX)):
+            return False
+        return not ngrams or (os.path.isfile(path + NGRAMS_SUFFIX + '.json') and
+                              EmbeddingStore.exists(path + NGRAMS_SUFFIX))
+
+    def __len__(self):
+        return len(self._t2i)
+
+    def __contains__(self, token):
+        if token in self._t2i:
+            return True
+        return self.ngrams is not None and \
+            any(ngram in self.ngrams for ngram in char_ngrams(token, self.min_n, self.max_n))
+
+    def __getitem__(self, tokens):
+        if isinstance(tokens, str):
+            vec = self._vector(tokens)
+            if vec is None:
+                raise KeyError(tokens)
+            return vec
+        return np.stack([self[token] for token in tokens]) if tokens else np.zeros([0, self.dim], np.float32)
+
+    def _ngrams_vector(self, token):
+        # Mean of the known n-gram vectors, summed in the same order as gensim does
+        if self.ngrams is None:
+            return None
+        idxs = [self.ngrams._t2i[ngram] for ngram in char_ngrams(token, self.min_n, self.max_n)
+                if ngram in self.ngrams._t2i]
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for idx in idxs:
+            vec += self.ngrams.matrix[idx]
+        if not vec.any():
+            return None
+        return vec / len(idxs)
+
+    def _vector(self, token):
+        idx = self._t2i.get(token)
+        if idx is None:
+            return self._ngrams_vector(token)
+        return np.array(self.matrix[idx], dtype=np.float32)
+
+    def vector(self, token):
+        """Return the vector of the token, zeros for unknown tokens"""
+        vec = self._vector(token)
+        return np.zeros(self.dim, dtype=np.float32) if vec is None else vec
+
+    def vectors(self, tokens):
+        """Return a float32 array [len(tokens), dim] with vectors of the tokens, zeros for unknown tokens"""
+        idxs = np.fromiter((self._t2i.get(token, -1) for token in tokens), dtype=np.int64, count=len(tokens))
+        result = np.zeros([len(tokens), self.dim], dtype=np.float32)
+        known = idxs >= 0
+        if np.any(known):
+            result[known] = self.matrix[idxs[known]]
+        if self.ngrams is not None:
+            for i in np.flatnonzero(~known):
+                vec = self._ngrams_vector(tokens[i])
+                if vec is not None:
+                    result[i] = vec
+        return result
@@ -0,0 +1,160 @@
+from collections import defaultdict, deque
+import json
+import sys
+import threading
+
+import numpy as np
+
+
+class PipelineHook:
+    """
+    Base class for hooks called by a ``Pipeline`` around every call of its components.
+    ``method`` is one of 'forward', 'forward_batch' and 'train', ``mem`` is the shared memory dict
+    (a list of dicts for 'forward_batch').
+    """
+
+    def before(self, component, method, mem):
+        pass
+
+    def after(self, component, method, mem, elapsed):
+        pass
+
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1., 2.5, 5., 10.)
+
+
+def component_name(component):
+    config = component.config
+    if "id" in config:
+        name = config["id"]
+    elif "component" in config:
+        name = config["component"]
+    else:
+        name = type(component).__name__
+    if component.outputs:
+        name = "%s:%s" % (name, ",".join(component.outputs))
+    return name
+
+
+def payload_size(value):
+    """Approximate size in bytes of a value stored in shared memory"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if hasattr(value, "indptr") and hasattr(value, "indices"):
+        # scipy sparse matrix
+        return value.data.nbytes + value.indices.nbytes + value.indptr.nbytes
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(payload_size(v) for v in value)
+    if isinstance(value, dict):
+        return sum(payload_size(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+def _batch_size(component, method, mem):
+    if method == "forward_batch":
+        return len(mem)
+    if method in ("forward", "train") and component.inputs:
+        # TrainPipeline runs whole provider batches through forward, take their size from the first input
+        value = mem.get(component.inputs[0])
+        if isinstance(value, (list, tuple, np.ndarray)):
+            return len(value)
+    return 1
+
+
+class _Stats:
+    def __init__(self, max_samples):
+        self.calls = 0
+        self.items = 0
+        self.total_time = 0.
+        self.payload_bytes = 0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.latencies = deque(maxlen=max_samples)
+
+    def add(self, elapsed, items, payload_bytes):
+        self.calls += 1
+        self.items += items
+        self.total_time += elapsed
+        self.payload_bytes += payload_bytes
+        self.latencies.append(elapsed)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if elapsed <= bound:
+                self.buckets[i] += 1
+
+    def summary(self):
+        latencies = np.array(self.latencies)
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) if len(latencies) else (0., 0., 0.)
+        return {
+            "calls": self.calls,
+            "items": self.items,
+            "total_seconds": self.total_time,
+            "mean_seconds": self.total_time / self.calls if self.calls else 0.,
+            "p50_seconds": float(p50),
+            "p90_seconds": float(p90),
+            "p99_seconds": float(p99),
+            "max_seconds": float(latencies.max()) if len(latencies) else 0.,
+            "mean_batch_size": self.items / self.calls if self.calls else 0.,
+            "items_per_second": self.items / self.total_time if self.total_time else 0.,
+            "mean_payload_bytes": self.payload_bytes / self.calls if self.calls else 0.
+        }
+
+
+class ComponentProfiler(PipelineHook):
+    """
+    Records wall time, call counts, batch sizes and sizes of the produced shared memory values for every
+    component of a pipeline. Percentiles are computed over the last ``max_samples`` calls of a component.
+    """
+
+    def __init__(self, max_samples=10000):
+        self.max_samples = max_samples
+        self._stats = defaultdict(lambda: _Stats(self.max_samples))
+        self._lock = threading.Lock()
+
+    def after(self, component, method, mem, elapsed):
+        items = _batch_size(component, method, mem)
+        mems = mem if method == "forward_batch" else [mem]
+        payload = sum(payload_size(m[k]) for m in mems for k in component.outputs if k in m)
+        with self._lock:
+            self._stats[(component_name(component), method)].add(elapsed, items, payload)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def summary(self):
+        with self._lock:
+            result = defaultdict(dict)
+            for (name, method), stats in self._stats.items():
+                result[name][method] = stats.summary()
+            return dict(result)
+
+    def to_json(self):
+        return json.dumps(self.summary(), indent=2, sort_keys=True)
+
+    def to_prometheus(self):
+        """Export the collected statistics in Prometheus text exposition format"""
+        with self._lock:
+            stats = sorted(self._stats.items())
+            lines = ["# HELP deeppavlov_component_latency_seconds Wall time of pipeline component calls",
+                     "# TYPE deeppavlov_component_latency_seconds histogram"]
+            for (name, method), s in stats:
+                labels = 'component="%s",method="%s"' % (name, method)
+                for bound, count in zip(LATENCY_BUCKETS, s.buckets):
+                    lines.append('deeppavlov_component_latency_seconds_bucket{%s,le="%s"} %s' % (labels, bound, count))
+                lines.append('deeppavlov_component_latency_seconds_bucket{%s,le="+Inf"} %s' % (labels, s.calls))
+                lines.append('deeppavlov_component_latency_seconds_sum{%s} %s' % (labels, s.total_time))
+                lines.append('deeppavlov_component_latency_seconds_count{%s} %s' % (labels, s.calls))
+            for metric, attr, help_text in [("items_total", "items", "Number of samples processed by components"),
+                                            ("payload_bytes_total", "payload_bytes",
+                                             "Size of shared memory values produced by components")]:
+                lines.append("# HELP deeppavlov_component_%s %s" % (metric, help_text))
+                lines.append("# TYPE deeppavlov_component_%s counter" % metric)
+                for (name, method), s in stats:
+                    lines.append('deeppavlov_component_%s{component="%s",method="%s"} %s'
+                                 % (metric, name, method, getattr(s, attr)))
+        return "\n".join(lines) + "\n"
+
+    def save(self, path):
+        with open(path, "w") as f:
+            f.write(self.to_prometheus() if path.endswith(".prom") else self.to_json())
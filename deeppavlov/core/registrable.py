@@ -1,16 +1,23 @@
 from collections import defaultdict
+import importlib
+
+
+def _same_class(registered, subclass):
+    return (registered.__module__, registered.__qualname__) == (subclass.__module__, subclass.__qualname__)
 
 
 class Registrable:
 
     _registry = defaultdict(dict)
+    _lazy_registry = defaultdict(dict)
 
     @classmethod
     def register(cls, name):
         registry = Registrable._registry[cls]
 
         def add_to_register(subclass):
-            if name in registry:
+            # A module re-imported after a failed import registers the same class again
+            if name in registry and not _same_class(registry[name], subclass):
                 message = "Can't register %s as %s. Name already in use for %s" % (
                     name, cls.__name__, registry[name].__name__)
                 raise ConnectionError(message)
@@ -18,13 +25,32 @@ class Registrable:
             return subclass
         return add_to_register
 
+    @classmethod
+    def register_lazy(cls, name, module):
+        """
+        Declare that ``name`` is registered by the module ``module``, which is imported only when the name
+        is looked up with ``by_name``.
+        """
+        Registrable._lazy_registry[cls][name] = module
+
     @classmethod
     def by_name(cls, name):
         registry = Registrable._registry[cls]
+        if name not in registry and name in Registrable._lazy_registry[cls]:
+            registered = {base: set(names) for base, names in Registrable._registry.items()}
+            try:
+                importlib.import_module(Registrable._lazy_registry[cls][name])
+            except Exception:
+                # Classes of a module which failed to import are not usable, forget their registrations
+                for base, names in list(Registrable._registry.items()):
+                    for added in set(names) - registered.get(base, set()):
+                        del names[added]
+                raise
         if name not in registry:
             raise ConnectionError("%s is not registered name for %s" % (name, cls.__name__))
         return registry.get(name)
 
     @classmethod
     def list_available(cls):
-        return list(Registrable._registry[cls])
\ No newline at end of file
+        names = list(Registrable._registry[cls])
+        return names + [name for name in Registrable._lazy_registry[cls] if name not in names]
\ No newline at end of file
@@ -0,0 +1,242 @@
+"""
+Micro-batching inference server for pipelines built with ``init_component``.
+
+The server loads a pipeline once, accepts JSON requests over HTTP and coalesces concurrent requests into
+micro-batches which are processed by ``Pipeline.forward_batch``. Usage:
+
+    python -m deeppavlov.core.server ./conf/infer.hcn.json --port 5000 --max-batch-size 32 --max-wait 5
+
+A request is a POST with a JSON object used as the initial shared memory, e.g. ``{"text": "cheap restaurant"}``,
+or a list of such objects. The response contains the shared memory after the pipeline has run (restricted
+to ``--out`` keys if given).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import asyncio
+import copy
+import json
+import logging
+
+import numpy as np
+from scipy import sparse
+
+from deeppavlov.core.components import read_configuration, init_component
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    def __init__(self, pipeline, max_batch_size=32, max_wait=0.005):
+        """
+        Args:
+            pipeline: component with ``forward_batch`` method, usually a ``Pipeline``
+            max_batch_size (int): maximum number of requests in one batch
+            max_wait (float): maximum time in seconds to wait for more requests after the first one arrived
+        """
+        self.pipeline = pipeline
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue()
+        # Components keep state between calls, so batches are processed one at a time
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        return self
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._executor.shutdown()
+
+    async def submit(self, shared_mem):
+        future = asyncio.get_event_loop().create_future()
+        await self.queue.put((shared_mem, future))
+        return await future
+
+    async def _next_batch(self):
+        loop = asyncio.get_event_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            batch = await self._next_batch()
+            smems = [smem for smem, _ in batch]
+            # Components may have written partial outputs before a failure, retries start from the requests
+            requests = [copy.deepcopy(smem) for smem in smems] if len(batch) > 1 else None
+            logger.debug("Dispatch batch of %s requests" % len(smems))
+            try:
+                await loop.run_in_executor(self._executor, self.pipeline.forward_batch, smems)
+            except Exception as e:
+                if requests is None:
+                    logger.exception("Request failed")
+                    self._set_result(batch[0][1], exception=e)
+                    continue
+                logger.exception("Batch failed, requests are retried one by one")
+                for smem, (_, future) in zip(requests, batch):
+                    try:
+                        await loop.run_in_executor(self._executor, self.pipeline.forward, smem)
+                    except Exception as request_error:
+                        logger.exception("Request failed")
+                        self._set_result(future, exception=request_error)
+                    else:
+                        self._set_result(future, smem)
+            else:
+                for smem, future in batch:
+                    self._set_result(future, smem)
+
+    @staticmethod
+    def _set_result(future, smem=None, exception=None):
+        # The client may have gone and its future cancelled
+        if future.done():
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(smem)
+
+
+def _to_json(value):
+    if sparse.issparse(value):
+        return value.toarray().tolist()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (tuple, set)):
+        return list(value)
+    raise TypeError("%s is not JSON serializable" % type(value).__name__)
+
+
+class InferenceServer:
+    def __init__(self, batcher, out_keys=None):
+        self.batcher = batcher
+        self.out_keys = out_keys
+
+    def _response(self, smem):
+        if self.out_keys:
+            return {k: smem.get(k) for k in self.out_keys}
+        return smem
+
+    async def _process(self, body):
+        request = json.loads(body.decode('utf-8'))
+        items = request if isinstance(request, list) else [request]
+        for item in items:
+            if not isinstance(item, dict):
+                raise ValueError("Request must be a JSON object or a list of JSON objects")
+        if isinstance(request, list):
+            results = await asyncio.gather(*[self.batcher.submit(dict(r)) for r in request])
+            return [self._response(smem) for smem in results]
+        return self._response(await self.batcher.submit(dict(request)))
+
+    @staticmethod
+    def _content_length(headers):
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise ValueError("Invalid Content-Length: %s" % headers['content-length'])
+        return length
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            try:
+                method = request_line.split()[0].decode('latin-1').upper()
+                body = await reader.readexactly(self._content_length(headers))
+            except IndexError:
+                status, payload = '400 Bad Request', {"error": "Malformed request line"}
+            except asyncio.IncompleteReadError:
+                status, payload = '400 Bad Request', {"error": "Request body is shorter than Content-Length"}
+            except ValueError as e:
+                status, payload = '400 Bad Request', {"error": str(e)}
+            else:
+                if method != 'POST':
+                    status, payload = '405 Method Not Allowed', {"error": "Only POST requests are supported"}
+                else:
+                    try:
+                        status, payload = '200 OK', await self._process(body)
+                    except ValueError as e:
+                        status, payload = '400 Bad Request', {"error": str(e)}
+                    except Exception as e:
+                        status, payload = '500 Internal Server Error', {"error": str(e)}
+
+            try:
+                data = json.dumps(payload, default=_to_json).encode('utf-8')
+            except (TypeError, ValueError) as e:
+                logger.exception("Response is not serializable")
+                status = '500 Internal Server Error'
+                data = json.dumps({"error": "Response is not serializable: %s" % e}).encode('utf-8')
+            writer.write(('HTTP/1.1 %s\r\n'
+                          'Content-Type: application/json\r\n'
+                          'Content-Length: %s\r\n'
+                          'Connection: close\r\n\r\n' % (status, len(data))).encode('latin-1') + data)
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+def serve(pipeline, host='127.0.0.1', port=5000, max_batch_size=32, max_wait=0.005, out_keys=None):
+    loop = asyncio.get_event_loop()
+    batcher = MicroBatcher(pipeline, max_batch_size=max_batch_size, max_wait=max_wait).start()
+    server = InferenceServer(batcher, out_keys=out_keys)
+    http = loop.run_until_complete(asyncio.start_server(server.handle, host, port))
+    logger.info("Serving on %s:%s" % (host, port))
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        http.close()
+        loop.run_until_complete(http.wait_closed())
+        batcher.stop()
+        pipeline.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a pipeline over HTTP with micro-batching")
+    parser.add_argument("config", help="path to the pipeline configuration")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait", type=float, default=5, help="max batching delay in milliseconds")
+    parser.add_argument("--out", nargs="*", default=None, help="shared memory keys to return")
+    args = parser.parse_args()
+
+    logging.basicConfig(format="%(asctime)s - %(levelname)s - %(name)s - %(message)s", level=logging.INFO)
+    pipeline = init_component(read_configuration(args.config))
+    pipeline.compile()
+    serve(pipeline, args.host, args.port, args.max_batch_size, args.max_wait / 1000., args.out)
+
+
+if __name__ == '__main__':
+    main()
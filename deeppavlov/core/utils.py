@@ -0,0 +1,55 @@
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Dict-like cache which holds at most ``max_size`` items (unbounded if ``max_size`` is None) and evicts
+    the least recently used item first. Counts hits, misses and evictions.
+    """
+
+    def __init__(self, max_size=None):
+        if max_size is not None and max_size < 1:
+            raise ValueError("Cache size should be positive, got %s" % max_size)
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if self.max_size is not None:
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        requests = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / requests if requests else 0.
+        }
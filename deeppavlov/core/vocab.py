@@ -1,7 +1,9 @@
 from deeppavlov.core.components import Component
 from deeppavlov.core.registrable import Registrable
-from collections import Counter, defaultdict
+from collections import Counter
+from itertools import chain
 import numpy as np
+from scipy import sparse
 from overrides import overrides
 
 import logging
@@ -13,65 +15,102 @@ class Vocabulary:
     def __init__(self, tokens=None, special_tokens=tuple(), dict_file_path=None):
         if tokens is None and dict_file_path is not None:
             tokens = self.load(dict_file_path)
-        self._t2i = dict()
         # We set default ind to position of <UNK> in SPECIAL_TOKENS
         # because the tokens will be added to dict in the same order as
         # in special_tokens
-        default_ind = 0
-        self._t2i = defaultdict(lambda: default_ind)
-        self._i2t = dict()
+        self.default_ind = 0
+        self._t2i = dict()
+        # index -> token table, the token at position i has index i
+        self._i2t = []
+        self._i2t_array = None
         self.frequencies = Counter()
 
         self.counter = 0
         for token in special_tokens:
-            self._t2i[token] = self.counter
+            self._add(token)
             self.frequencies[token] += 0
-            self._i2t[self.counter] = token
-            self.counter += 1
         if tokens is not None:
             self.update_dict(tokens)
 
+    def _add(self, token):
+        self._t2i[token] = self.counter
+        self._i2t.append(token)
+        self._i2t_array = None
+        self.counter += 1
+
     def update_dict(self, tokens):
         for token in tokens:
             if not isinstance(token, str):
                 self.update_dict(token)
             else:
                 if token not in self._t2i:
-                    self._t2i[token] = self.counter
-                    self._i2t[self.counter] = token
-                    self.counter += 1
+                    self._add(token)
                 self.frequencies[token] += 1
 
     def idx2tok(self, idx):
         return self._i2t[idx]
 
     def idxs2toks(self, idxs, filter_paddings=False):
-        toks = []
-        for idx in idxs:
-            if not filter_paddings or idx != self.tok2idx('<PAD>'):
-                toks.append(self._i2t[idx])
-        return toks
+        if filter_paddings:
+            pad_idx = self.tok2idx('<PAD>')
+            return [self._i2t[idx] for idx in idxs if idx != pad_idx]
+        return [self._i2t[idx] for idx in idxs]
 
     def process(self, tokens):
-        if not isinstance(tokens, str):
-            return [self.process(token) for token in tokens]
-        else:
+        if isinstance(tokens, str):
             return self.tok2idx(tokens)
+        if all(isinstance(token, str) for token in tokens):
+            return self.toks2idxs(tokens)
+        return [self.process(token) for token in tokens]
 
     def tok2idx(self, tok):
-        return self._t2i[tok]
+        return self._t2i.get(tok, self.default_ind)
 
     def toks2idxs(self, toks):
-        return [self._t2i[tok] for tok in toks]
+        t2i, default_ind = self._t2i, self.default_ind
+        return [t2i.get(tok, default_ind) for tok in toks]
+
+    def known_idxs(self, toks):
+        """Return indices of the tokens which are in the vocabulary, unknown tokens are skipped"""
+        t2i = self._t2i
+        return [t2i[tok] for tok in toks if tok in t2i]
+
+    def encode_batch(self, b_toks):
+        """
+        Convert a batch of token sequences to indices
+        Args:
+            b_toks: list of token lists
+        Returns:
+            batch: int32 array [batch_size, max_len] padded with the index of <PAD>
+            lengths: int32 array [batch_size] with lengths of the sequences
+        """
+        lengths = np.fromiter(map(len, b_toks), dtype=np.int32, count=len(b_toks))
+        max_len = lengths.max() if len(lengths) > 0 else 0
+        batch = np.full([len(b_toks), max_len], self.tok2idx('<PAD>'), dtype=np.int32)
+        t2i, default_ind = self._t2i, self.default_ind
+        idxs = np.fromiter((t2i.get(tok, default_ind) for tok in chain.from_iterable(b_toks)),
+                           dtype=np.int32, count=int(lengths.sum()))
+        batch[np.arange(max_len) < lengths[:, np.newaxis]] = idxs
+        return batch, lengths
+
+    def decode_batch(self, b_idxs, lengths=None):
+        """
+        Convert a batch of indices to tokens
+        Args:
+            b_idxs: array [batch_size, max_len] of indices
+            lengths: lengths of the sequences, padding is returned as well if not given
+        Returns:
+            list of token lists
+        """
+        if self._i2t_array is None:
+            self._i2t_array = np.array(self._i2t, dtype=object)
+        b_toks = self._i2t_array[np.asarray(b_idxs, dtype=np.int64)].tolist()
+        if lengths is not None:
+            b_toks = [toks[:length] for toks, length in zip(b_toks, lengths)]
+        return b_toks
 
     def batch_toks2batch_idxs(self, b_toks):
-        max_len = max(len(toks) for toks in b_toks)
-        # Create array filled with paddings
-        batch = np.ones([len(b_toks), max_len]) * self.tok2idx('<PAD>')
-        for n, tokens in enumerate(b_toks):
-            idxs = self.toks2idxs(tokens)
-            batch[n, :len(idxs)] = idxs
-        return batch
+        return self.encode_batch(b_toks)[0]
 
     def batch_idxs2batch_toks(self, b_idxs, filter_paddings=False):
         return [self.idxs2toks(idxs, filter_paddings) for idxs in b_idxs]
@@ -81,7 +120,7 @@ class Vocabulary:
         return x_t == self.tok2idx('<PAD>')
 
     def __getitem__(self, key):
-        return self._t2i[key]
+        return self.tok2idx(key)
 
     def __len__(self):
         return self.counter
@@ -99,7 +138,7 @@ class Vocabulary:
 
     def save(self, path):
         with open(path, "w+") as f:
-            for token in self._t2i.keys():
+            for token in self._i2t:
                 f.write("%s\n" % token)
 
 
@@ -149,14 +188,37 @@ class BowComponent(VocabComponent):
         super().__init__(config)
         self.local_input_names = ['tokens']
         self.local_output_names = ['bow']
+        # Output a 1 x len(vocab) scipy CSR row instead of a dense vector
+        self.sparse = self.config["sparse"] if "sparse" in self.config else False
+
+    def encode_batch(self, tokens_batch):
+        """Return bag-of-words counts for a batch of token lists as a CSR matrix [batch_size, len(vocab)]"""
+        indptr = [0]
+        indices = []
+        for tokens in tokens_batch:
+            indices.extend(self.vocab.known_idxs(tokens))
+            indptr.append(len(indices))
+        data = np.ones(len(indices), dtype=np.int32)
+        bow = sparse.csr_matrix((data, indices, indptr), shape=(len(tokens_batch), len(self.vocab)))
+        bow.sum_duplicates()
+        return bow
 
     @overrides
     def forward(self, smem, add_local_mem=False):
         if len(self.inputs) > 0 and len(self.outputs) > 0:
             tokens = self.get_input("tokens", smem)
-            bow = np.zeros([len(self.vocab)], dtype=np.int32)
-            for word in tokens:
-                if word in self.vocab:
-                    idx = self.vocab.tok2idx(word)
-                    bow[idx] += 1
-            self.set_output("bow", bow, smem)
\ No newline at end of file
+            if self.sparse:
+                bow = self.encode_batch([tokens])
+            else:
+                bow = np.bincount(self.vocab.known_idxs(tokens), minlength=len(self.vocab)).astype(np.int32)
+            self.set_output("bow", bow, smem)
+
+    @overrides
+    def forward_batch(self, smems, add_local_mem=False):
+        if len(self.inputs) > 0 and len(self.outputs) > 0:
+            bow = self.encode_batch(self.get_batch_input("tokens", smems))
+            if self.sparse:
+                rows = [bow[n] for n in range(bow.shape[0])]
+            else:
+                rows = list(bow.toarray())
+            self.set_batch_output("bow", rows, smems)
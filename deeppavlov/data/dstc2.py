@@ -26,6 +26,7 @@ from sklearn.model_selection import train_test_split
 import numpy as np
 
 from deeppavlov.data.utils import is_done, mark_done, download_untar, download
+from deeppavlov.data.gazetteer import Gazetteer
 
 from deeppavlov.core.data import DatasetReader, DatasetProvider
 
@@ -51,61 +52,83 @@ class DSTC2Reader(DatasetReader):
         return os.path.join(data_path, 'dstc2-trn.jsonlist')
 
     @staticmethod
-    def read(data_path, *args, **kwargs):
+    def sources(data_path=None):
+        return [DSTC2Reader.build(data_path)]
+
+    @staticmethod
+    def read(data_path, *args, stream=False, **kwargs):
+        """
+        Read DSTC2 dialogs. With ``stream=True`` the dialogs are not loaded into memory, but are read from
+        the file every time the returned ``DSTC2DialogStream`` is iterated.
+        """
         file_path = DSTC2Reader.build(data_path)
         logger.info("Reading instances from lines in file at: {}".format(file_path))
-        utterances, responses, dialog_indices = \
-            DSTC2Reader._read_turns(file_path, with_indices=True)
-
-        data = [{'context': {'text': u['text'],
-                             'intents': u['dialog_acts'],
-                             'db_result': u.get('db_result', None)},
-                 'response': {'text': r['text'],
-                              'act': r['dialog_acts'][0]['act']}} \
-                for u, r in zip(utterances, responses)]
-
-        return {
-            "train": [data[idx['start']:idx['end']] for idx in dialog_indices]
-        }
+        if stream:
+            return {"train": DSTC2DialogStream(file_path)}
+        return {"train": list(DSTC2Reader.iter_dialogs(file_path))}
 
     @staticmethod
-    def _read_turns(file_path, with_indices=False):
-        def _filter(turn):
-            del turn['index']
-            return turn
-
+    def iter_dialogs(file_path):
+        """Yield dialogs of the file one by one, a dialog is a list of turns"""
         utterances = []
         responses = []
-        dialog_indices = []
-        n = 0
-        num_dial_utter, num_dial_resp = 0, 0
         with open(file_path, 'rt') as f:
             for ln in f:
                 if not ln.strip():
-                    if num_dial_utter != num_dial_resp:
+                    if len(utterances) != len(responses):
                         raise RuntimeError("Datafile in the wrong format.")
-                    n += num_dial_utter
-                    dialog_indices.append({
-                        'start': n - num_dial_utter,
-                        'end': n,
-                    })
-                    num_dial_utter, num_dial_resp = 0, 0
+                    yield [{'context': {'text': u['text'],
+                                        'intents': u['dialog_acts'],
+                                        'db_result': u.get('db_result', None)},
+                            'response': {'text': r['text'],
+                                         'act': r['dialog_acts'][0]['act']}}
+                           for u, r in zip(utterances, responses)]
+                    utterances = []
+                    responses = []
                 else:
-                    replica = _filter(json.loads(ln))
+                    replica = json.loads(ln)
+                    del replica['index']
                     if 'goals' in replica:
                         utterances.append(replica)
-                        num_dial_utter += 1
                     else:
                         responses.append(replica)
-                        num_dial_resp += 1
 
-        if with_indices:
-            return utterances, responses, dialog_indices
-        return utterances, responses
+
+class DSTC2DialogStream:
+    """
+    Re-iterable sequence of DSTC2 dialogs, which are read from the file lazily on every iteration.
+    """
+
+    def __init__(self, file_path, transform=None):
+        self.file_path = file_path
+        self.transform = transform
+
+    def __iter__(self):
+        dialogs = DSTC2Reader.iter_dialogs(self.file_path)
+        if self.transform is None:
+            return dialogs
+        return map(self.transform, dialogs)
+
+    def map(self, fn):
+        """Return a stream of dialogs transformed with ``fn``"""
+        if self.transform is None:
+            return DSTC2DialogStream(self.file_path, fn)
+        transform = self.transform
+        return DSTC2DialogStream(self.file_path, lambda dialog: fn(transform(dialog)))
+
+
+class _ChainedStream:
+    def __init__(self, *parts):
+        self.parts = parts
+
+    def __iter__(self):
+        return itertools.chain(*self.parts)
 
 
 @Registrable.register("provider.ner.dstc2")
 class DSTC2NerProvider(DatasetProvider):
+    # TODO: add external building
+    SLOT_VALS_PATH = "/home/aleksandr/Downloads/slot_vals.json"
 
     @overrides
     def __init__(self, data, seed):
@@ -116,11 +139,11 @@ class DSTC2NerProvider(DatasetProvider):
                     of different input features.
         """
         super().__init__(data, seed)
-        # TODO: add external building
-        with open("/home/aleksandr/Downloads/slot_vals.json") as f:
+        with open(self.SLOT_VALS_PATH) as f:
             self._slot_vals = json.load(f)
+        gazetteer = Gazetteer.from_slot_vals(self._slot_vals)
         for data_type in ['train', 'test', 'valid']:
-            bio_markup_data = self._preprocess(data.get(data_type, []))
+            bio_markup_data = self._preprocess(data.get(data_type, []), gazetteer)
             setattr(self, data_type, bio_markup_data)
         self.data = {
             'train': self.train,
@@ -129,7 +152,7 @@ class DSTC2NerProvider(DatasetProvider):
             'all': self.train + self.test + self.valid
         }
 
-    def _preprocess(self, data_part):
+    def _preprocess(self, data_part, gazetteer):
         processed_data_part = list()
         slots = []
         for sample in data_part:
@@ -144,29 +167,21 @@ class DSTC2NerProvider(DatasetProvider):
                         if slot_type in self._slot_vals:
                             slots.append((slot_type, slot_val,))
 
-                processed_data_part.append(self._add_bio_markup(text, slots))
+                processed_data_part.append(self._add_bio_markup(text, slots, gazetteer))
         return processed_data_part
 
-    def _add_bio_markup(self, utterance, slots):
+    @classmethod
+    @overrides
+    def cache_sources(cls):
+        return [cls.SLOT_VALS_PATH]
+
+    @staticmethod
+    def _add_bio_markup(utterance, slots, gazetteer):
         tokens = utterance.split()
-        n_toks = len(tokens)
-        tags = ['O' for _ in range(n_toks)]
-        for n in range(n_toks):
-            for slot_type, slot_val in slots:
-                for entity in self._slot_vals[slot_type][slot_val]:
-                    slot_tokens = entity.split()
-                    slot_len = len(slot_tokens)
-                    if n + slot_len < n_toks and self._is_equal_sequences(tokens[n: n + slot_len], slot_tokens):
-                        tags[n] = 'B-' + slot_type
-                        for k in range(1, slot_len):
-                            tags[n + k] = 'I-' + slot_type
-                        break
+        # Only values of the slots of the utterance are tagged, a mention can't end with the last token
+        tags = gazetteer.tag(tokens, allowed=set(slots), end=len(tokens) - 1)
         return tokens, tags
 
-    def _is_equal_sequences(self, seq1, seq2):
-        equality_list = [tok1 == tok2 for tok1, tok2 in zip(seq1, seq2)]
-        return all(equality_list)
-
     def _build_slot_vals(self, slot_vals_json_path='data/'):
         url = 'http://lnsigo.mipt.ru/export/datasets/dstc_slot_vals.json'
         download(slot_vals_json_path, url)
@@ -185,10 +200,13 @@ class DSTC2NerProvider(DatasetProvider):
 
 @Registrable.register("provider.dialog.dstc2")
 class DSTC2DialogProvider(DatasetProvider):
+    supports_stream = True
 
     @overrides
     def __init__(self, data, seed, *args, **kwargs):
-        super().__init__(data, seed)
+        # Dialogs of a stream are read from the file on every pass instead of being kept in memory
+        stream = any(isinstance(data.get(data_type), DSTC2DialogStream) for data_type in ['train', 'valid', 'test'])
+        super().__init__({} if stream else data, seed)
 
         def _wrap(turn):
             if isinstance(turn, list):
@@ -205,15 +223,21 @@ class DSTC2DialogProvider(DatasetProvider):
                     other['episode_done'] = True
                 return x, y, other
 
-        self.train = list(map(_wrap, data.get('train', [])))
-        self.valid = list(map(_wrap, data.get('valid', [])))
-        self.test = list(map(_wrap, data.get('test', [])))
+        def _wrap_part(part):
+            if isinstance(part, DSTC2DialogStream):
+                return part.map(_wrap)
+            return list(map(_wrap, part))
+
+        self.train = _wrap_part(data.get('train', []))
+        self.valid = _wrap_part(data.get('valid', []))
+        self.test = _wrap_part(data.get('test', []))
         self.split(*args, **kwargs)
         self.data = {
             'train': self.train,
             'valid': self.valid,
             'test': self.test,
-            'all': self.train + self.test + self.valid
+            'all': _ChainedStream(self.train, self.test, self.valid) if stream
+            else self.train + self.test + self.valid
         }
 
     @overrides
@@ -359,13 +383,13 @@ class DSTC2IntentsProvider(DatasetProvider):
 
     def preprocess(self, prep_method):
 
-        data_copy = copy.deepcopy(self.data)
+        data = dict()
 
         for data_type in self.data:
             chunk = self.data[data_type]
-            for i, sample in enumerate(chunk):
-                data_copy[i] = (prep_method([sample[0]])[0], chunk[i][1])
-        return data_copy
+            texts = prep_method([sample[0] for sample in chunk])
+            data[data_type] = [(text, copy.deepcopy(sample[1])) for text, sample in zip(texts, chunk)]
+        return data
 
     @overrides
     def batch_generator(self, batch_size, data_type='train'):
@@ -0,0 +1,76 @@
+class Gazetteer:
+    """
+    Token trie of entity surface forms. Tags a tokenized utterance in a single left-to-right pass: at every
+    position the longest entity starting there is taken and the search continues after its end.
+    """
+
+    # Key of the trie node item with (slot_type, slot_val) pairs of entities ending in the node
+    _END = None
+
+    def __init__(self):
+        self._root = {}
+        self.max_len = 0
+
+    @classmethod
+    def from_slot_vals(cls, slot_vals):
+        """
+        Args:
+            slot_vals (dict): {slot_type: {slot_val: [entity, ...]}}, format of the DSTC2 slot values file
+        """
+        gazetteer = cls()
+        for slot_type, values in slot_vals.items():
+            for slot_val, entities in values.items():
+                for entity in entities:
+                    gazetteer.add(entity.split(), slot_type, slot_val)
+        return gazetteer
+
+    def add(self, tokens, slot_type, slot_val):
+        if not tokens:
+            return
+        node = self._root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault(self._END, []).append((slot_type, slot_val))
+        self.max_len = max(self.max_len, len(tokens))
+
+    def matches(self, tokens, allowed=None, end=None):
+        """
+        Find non-overlapping entity mentions.
+        Args:
+            tokens: list of str
+            allowed: container of (slot_type, slot_val) pairs, only these entities are matched if given
+            end: matches should end before this position, defaults to len(tokens)
+        Returns:
+            list of (start, end, slot_type, slot_val) tuples
+        """
+        end = len(tokens) if end is None else end
+        result = []
+        i = 0
+        while i < end:
+            node = self._root
+            match = None
+            j = i
+            while j < end:
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                j += 1
+                for slot in node.get(self._END, ()):
+                    if allowed is None or slot in allowed:
+                        match = (i, j) + slot
+                        break
+            if match is None:
+                i += 1
+            else:
+                result.append(match)
+                i = match[1]
+        return result
+
+    def tag(self, tokens, allowed=None, end=None):
+        """Return BIO tags of the tokens, arguments are the same as of ``matches``"""
+        tags = ['O'] * len(tokens)
+        for start, stop, slot_type, _ in self.matches(tokens, allowed, end):
+            tags[start] = 'B-' + slot_type
+            for k in range(start + 1, stop):
+                tags[k] = 'I-' + slot_type
+        return tags
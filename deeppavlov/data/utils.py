@@ -77,57 +77,133 @@ def is_done(path):
     return os.path.isfile(os.path.join(path, _MARK_DONE))
 
 
-def simple_prep(data: list) -> list:
+def _overlaps(a, b):
+    """True if a proper suffix of ``a`` is a proper prefix of ``b``"""
+    return any(b.startswith(a[k:]) for k in range(max(1, len(a) - len(b) + 1), len(a)))
+
+
+def _interferes(text, pattern):
+    """True if an inserted ``text`` can be a part of an occurrence of ``pattern``"""
+    return pattern in text or text in pattern or _overlaps(text, pattern) or _overlaps(pattern, text)
+
+
+def _literal_pass(rules):
+    if len(rules) == 1:
+        pattern, repl = rules[0]
+        return lambda text: text.replace(pattern, repl)
+    table = dict(rules)
+    regex = re.compile('|'.join(re.escape(pattern) for pattern, _ in rules))
+    return lambda text: regex.sub(lambda m: table[m.group(0)], text)
+
+
+def _regex_pass(pattern, repl):
+    regex = re.compile(pattern)
+    return lambda text: regex.sub(repl, text)
 
-    f = [x.lower() for x in data]
-    f = [x.replace("\\n", " ") for x in f]
-    f = [x.replace("\\t", " ") for x in f]
-    f = [x.replace("\\xa0", " ") for x in f]
-    f = [x.replace("\\xc2", " ") for x in f]
-
-    f = [re.sub('!!+', ' !! ', x) for x in f]
-    f = [re.sub('!', ' ! ', x) for x in f]
-    f = [re.sub('! !', '!!', x) for x in f]
-
-    f = [re.sub('\?\?+', ' ?? ', x) for x in f]
-    f = [re.sub('\?', ' ? ', x) for x in f]
-    f = [re.sub('\? \?', '??', x) for x in f]
-
-    f = [re.sub('\?!+', ' ?! ', x) for x in f]
-
-    f = [re.sub('\.\.+', '..', x) for x in f]
-    f = [re.sub('\.', ' . ', x) for x in f]
-    f = [re.sub('\.  \.', '..', x) for x in f]
-
-    f = [re.sub(',', ' , ', x) for x in f]
-    f = [re.sub(':', ' : ', x) for x in f]
-    f = [re.sub(';', ' ; ', x) for x in f]
-    f = [re.sub('\%', ' % ', x) for x in f]
-
-    f = [x.replace("won't", "will not") for x in f]
-    f = [x.replace("can't", "cannot") for x in f]
-    f = [x.replace("i'm", "i am") for x in f]
-    f = [x.replace(" im ", " i am ") for x in f]
-    f = [x.replace("you're ", "you are") for x in f]
-    f = [x.replace("'re", " are") for x in f]
-    f = [x.replace("ain't", "is not") for x in f]
-    f = [x.replace("'ll", " will") for x in f]
-    f = [x.replace("'t", " not") for x in f]
-    f = [x.replace("'ve", " have") for x in f]
-    f = [x.replace("'s", " is") for x in f]
-    f = [x.replace("'re", " are") for x in f]
-    f = [x.replace("'d", " would") for x in f]
-
-    f = [re.sub("ies( |$)", "y ", x) for x in f]
-    f = [re.sub("s( |$)", " ", x) for x in f]
-    f = [re.sub("ing( |$)", " ", x) for x in f]
-    f = [x.replace("tard ", " ") for x in f]
-
-    f = [re.sub(" [*$%&#@][*$%&#@]+", " xexp ", x) for x in f]
-    f = [re.sub(" [0-9]+ ", " DD ", x) for x in f]
-    f = [re.sub("<\S*>", "", x) for x in f]
-    f = [re.sub('\s+', ' ', x) for x in f]
-    return f
+
+class TextNormalizer:
+    """
+    Applies a sequence of rewriting rules to texts. Rules are ``(pattern, replacement, is_regex)`` tuples applied
+    one after another. Regexes are compiled once. Consecutive literal rules are merged into one alternation regex
+    when it gives the same result as applying them one by one: occurrences of the merged patterns can not overlap
+    and a replacement can not create or destroy an occurrence of a pattern applied after it.
+    """
+
+    def __init__(self, rules, lower=True):
+        self.lower = lower
+        self.passes = []
+        group = []
+        for pattern, repl, is_regex in rules:
+            if group and (is_regex or not self._can_merge(group, pattern)):
+                self.passes.append(_literal_pass(group))
+                group = []
+            if is_regex:
+                self.passes.append(_regex_pass(pattern, repl))
+            else:
+                group.append((pattern, repl))
+        if group:
+            self.passes.append(_literal_pass(group))
+
+    @staticmethod
+    def _can_merge(group, pattern):
+        for prev_pattern, prev_repl in group:
+            if prev_pattern in pattern or _overlaps(prev_pattern, pattern) or _overlaps(pattern, prev_pattern):
+                return False
+            if _interferes(prev_repl, pattern):
+                return False
+        return True
+
+    def normalize(self, text):
+        if self.lower:
+            text = text.lower()
+        for normalize_pass in self.passes:
+            text = normalize_pass(text)
+        return text
+
+    def stream(self, texts):
+        """Lazily normalize an iterable of texts"""
+        for text in texts:
+            yield self.normalize(text)
+
+    def __call__(self, texts):
+        return [self.normalize(text) for text in texts]
+
+
+SIMPLE_PREP_RULES = [
+    ("\\n", " ", False),
+    ("\\t", " ", False),
+    ("\\xa0", " ", False),
+    ("\\xc2", " ", False),
+
+    (r'!!+', ' !! ', True),
+    ('!', ' ! ', False),
+    ('! !', '!!', False),
+
+    (r'\?\?+', ' ?? ', True),
+    ('?', ' ? ', False),
+    ('? ?', '??', False),
+
+    (r'\?!+', ' ?! ', True),
+
+    (r'\.\.+', '..', True),
+    ('.', ' . ', False),
+    ('.  .', '..', False),
+
+    (',', ' , ', False),
+    (':', ' : ', False),
+    (';', ' ; ', False),
+    ('%', ' % ', False),
+
+    ("won't", "will not", False),
+    ("can't", "cannot", False),
+    ("i'm", "i am", False),
+    (" im ", " i am ", False),
+    ("you're ", "you are", False),
+    ("'re", " are", False),
+    ("ain't", "is not", False),
+    ("'ll", " will", False),
+    ("'t", " not", False),
+    ("'ve", " have", False),
+    ("'s", " is", False),
+    ("'re", " are", False),
+    ("'d", " would", False),
+
+    (r"ies( |$)", "y ", True),
+    (r"s( |$)", " ", True),
+    (r"ing( |$)", " ", True),
+    ("tard ", " ", False),
+
+    (r" [*$%&#@][*$%&#@]+", " xexp ", True),
+    (r" [0-9]+ ", " DD ", True),
+    (r"<\S*>", "", True),
+    (r"\s+", " ", True)
+]
+
+_SIMPLE_PREP = TextNormalizer(SIMPLE_PREP_RULES)
+
+
+def simple_prep(data: list) -> list:
+    return _SIMPLE_PREP(data)
 
 
 PREPROCESSORS = {"simple_prep": simple_prep}
\ No newline at end of file
@@ -19,23 +19,33 @@ from pathlib import Path
 from gensim.models.wrappers.fasttext import FastText
 
 from deeppavlov.intents.utils import download_untar
+from deeppavlov.core.emb_store import EmbeddingStore, save_embeddings, save_ngrams
+from deeppavlov.core.utils import LRUCache
 
 
 class EmbeddingInferableModel(object):
 
-    def __init__(self, embedding_dim, embedding_fname=None, embedding_url=None,  *args, **kwargs):
+    def __init__(self, embedding_dim, embedding_fname=None, embedding_url=None, mmap=False, cache_size=100000,
+                 *args, **kwargs):
         """
         Method initialize the class according to given parameters.
         Args:
             embedding_fname: name of file with embeddings
             embedding_dim: dimension of embeddings
             embedding_url: url link to embedding to try to download if file does not exist
+            mmap: use memory-mapped embeddings store next to the fastText file (it is created on first use)
+                instead of loading the fastText model in memory
+            cache_size: maximum number of token embeddings kept in tok2emb, None for unbounded cache
             *args:
             **kwargs:
         """
-        self.tok2emb = {}
+        self.tok2emb = LRUCache(cache_size)
         self.embedding_dim = embedding_dim
+        # Shared embedding of out-of-vocabulary tokens
+        self._zero_emb = np.zeros(embedding_dim, dtype=np.float32)
+        self._zero_emb.flags.writeable = False
         self.model = None
+        self.mmap = mmap
         self.load(embedding_fname, embedding_url)
 
     def add_items(self, sentence_li):
@@ -49,13 +59,37 @@ class EmbeddingInferableModel(object):
             tokens = sen.split(' ')
             tokens = [el for el in tokens if el != '']
             for tok in tokens:
-                if self.tok2emb.get(tok) is None:
-                    try:
-                        self.tok2emb[tok] = self.model[tok]
-                    except KeyError:
-                        self.tok2emb[tok] = np.zeros(self.embedding_dim)
+                if tok not in self.tok2emb:
+                    self.tok2emb[tok] = self._lookup(tok)
         return
 
+    def _lookup(self, tok):
+        try:
+            return np.asarray(self.model[tok], dtype=np.float32)
+        except KeyError:
+            return self._zero_emb
+
+    def embed_tokens(self, tokens):
+        """
+        Method returns embeddings of the given tokens gathered in one array
+        Args:
+            tokens: list of tokens
+        Returns:
+            float32 array [len(tokens), embedding_dim]
+        """
+        if self.mmap:
+            return self.model.vectors(tokens)
+        unique_tokens = list(dict.fromkeys(tokens))
+        if len(unique_tokens) == 0:
+            return np.zeros([0, self.embedding_dim], dtype=np.float32)
+        unique_embeddings = np.stack(self._embed(unique_tokens))
+        tok2row = {tok: i for i, tok in enumerate(unique_tokens)}
+        return unique_embeddings[[tok2row[tok] for tok in tokens]]
+
+    def cache_stats(self):
+        """Return size, hits, misses and evictions of the tok2emb cache"""
+        return self.tok2emb.stats()
+
     def emb2str(self, vec):
         """
         Method returns string corresponding to the given embedding vectors
@@ -90,9 +124,32 @@ class EmbeddingInferableModel(object):
                 download_untar(embedding_url, download_path)
             except Exception as e:
                 raise RuntimeError('Looks like the `EMBEDDINGS_URL` variable is set incorrectly', e)
-        self.model = FastText.load_fasttext_format(fasttext_model_file)
+        if self.mmap:
+            if not EmbeddingStore.exists(fasttext_model_file, ngrams=True):
+                model = FastText.load_fasttext_format(fasttext_model_file)
+                save_embeddings(fasttext_model_file, model.wv.index2word, model.wv.syn0)
+                # Out-of-vocabulary tokens are embedded with n-gram vectors, as gensim does
+                ngrams = sorted(model.wv.ngrams, key=model.wv.ngrams.get)
+                save_ngrams(fasttext_model_file, ngrams, model.wv.syn0_ngrams, model.wv.min_n, model.wv.max_n)
+                del model
+            self.model = EmbeddingStore(fasttext_model_file)
+        else:
+            self.model = FastText.load_fasttext_format(fasttext_model_file)
         return
 
+    def _embed(self, tokens):
+        if self.mmap:
+            # Rows are read from the shared page cache, there is no need to keep per-process copies
+            return [self.model.vector(tok) for tok in tokens]
+        embedded_tokens = []
+        for tok in tokens:
+            emb = self.tok2emb.get(tok)
+            if emb is None:
+                emb = self._lookup(tok)
+                self.tok2emb[tok] = emb
+            embedded_tokens.append(emb)
+        return embedded_tokens
+
     def infer(self, instance, *args, **kwargs):
         """
         Method returns embedded data
@@ -103,10 +160,7 @@ class EmbeddingInferableModel(object):
         """
         if type(instance) is str:
             tokens = instance.split(" ")
-            self.add_items(tokens)
-            embedded_tokens = []
-            for tok in tokens:
-                embedded_tokens.append(self.tok2emb.get(tok))
+            embedded_tokens = self._embed(tokens)
             if len(tokens) == 1:
                 embedded_tokens = embedded_tokens[0]
             return embedded_tokens
@@ -114,9 +168,5 @@ class EmbeddingInferableModel(object):
             embedded_instance = []
             for sample in instance:
                 tokens = sample.split(" ")
-                self.add_items(tokens)
-                embedded_tokens = []
-                for tok in tokens:
-                    embedded_tokens.append(self.tok2emb.get(tok))
-                embedded_instance.append(embedded_tokens)
+                embedded_instance.append(self._embed(tokens))
             return embedded_instance
\ No newline at end of file
@@ -37,17 +37,35 @@ class IntentsComponent(Component):
             path = self.config["load"]
             self.model.load(path)
 
+    @staticmethod
+    def _model_inputs(tokens):
+        # Texts passed to the model for one input, the model predicts an empty list as an empty text
+        if isinstance(tokens, list):
+            return tokens if tokens else [""]
+        return [tokens]
+
     @overrides
     def forward(self, smem, add_local_mem=False):
         tokens = self._get_input_by_idx(0, smem)
 
-        if isinstance(tokens, list):
-            prediction = self.model.infer(tokens)
-        else:
-            prediction = self.model.infer([tokens])
+        prediction = self.model.infer(self._model_inputs(tokens))
 
         self.set_output("result", prediction, smem)
 
+    @overrides
+    def forward_batch(self, smems, add_local_mem=False):
+        inputs_batch = [self._model_inputs(tokens) for tokens in self.get_batch_input("tokens", smems)]
+
+        # One model call for all inputs, predictions are split back by the number of texts of each input
+        predictions = self.model.infer([text for inputs in inputs_batch for text in inputs])
+
+        results = []
+        start = 0
+        for inputs in inputs_batch:
+            results.append(predictions[start:start + len(inputs)])
+            start += len(inputs)
+        self.set_batch_output("result", results, smems)
+
     @overrides
     def train(self, smem, add_local_mem=False):
 
@@ -15,6 +15,7 @@
 
 import json
 import copy
+from itertools import chain
 from pathlib import Path
 import numpy as np
 
@@ -66,13 +67,19 @@ class KerasMulticlassModel(KerasModel):
         else:
             self.add_metrics = None
 
+        fasttext_mmap = self.opt['fasttext_mmap'] if 'fasttext_mmap' in self.opt.keys() else False
+        fasttext_cache_size = self.opt['fasttext_cache_size'] if 'fasttext_cache_size' in self.opt.keys() else 100000
         if self.opt['fasttext_model'] is not None:
             if Path(self.opt['fasttext_model']).is_file():
                 self.fasttext_model = EmbeddingInferableModel(embedding_fname=self.opt['fasttext_model'],
-                                                              embedding_dim=self.opt['embedding_size'])
+                                                              embedding_dim=self.opt['embedding_size'],
+                                                              mmap=fasttext_mmap,
+                                                              cache_size=fasttext_cache_size)
             else:
                 self.fasttext_model = EmbeddingInferableModel(embedding_dim=self.opt['embedding_size'],
-                                                              embedding_url='http://lnsigo.mipt.ru/export/intent/reddit_fasttext_model.tar.gz')
+                                                              embedding_url='http://lnsigo.mipt.ru/export/intent/reddit_fasttext_model.tar.gz',
+                                                              mmap=fasttext_mmap,
+                                                              cache_size=fasttext_cache_size)
         else:
             raise IOError("Error: FastText intent_model file path is not given")
 
@@ -100,24 +107,18 @@ class KerasMulticlassModel(KerasModel):
         self.metrics_values = len(self.metrics_names) * [0.]
 
     def texts2vec(self, sentences):
-        embeddings_batch = []
+        text_size = self.opt['text_size']
+        tokens_batch = []
         for sen in sentences:
-            embeddings = []
-            tokens = sen.split(' ')
-            tokens = [el for el in tokens if el != '']
-            if len(tokens) > self.opt['text_size']:
-                tokens = tokens[:self.opt['text_size']]
-            for tok in tokens:
-                embeddings.append(self.fasttext_model.infer(tok))
-            if len(tokens) < self.opt['text_size']:
-                pads = [np.zeros(self.opt['embedding_size'])
-                        for _ in range(self.opt['text_size'] - len(tokens))]
-                embeddings = pads + embeddings
-
-            embeddings = np.asarray(embeddings)
-            embeddings_batch.append(embeddings)
-
-        embeddings_batch = np.asarray(embeddings_batch)
+            tokens = [el for el in sen.split(' ') if el != '']
+            tokens_batch.append(tokens[:text_size])
+
+        embeddings_batch = np.zeros([len(sentences), text_size, self.opt['embedding_size']], dtype=np.float32)
+        lengths = np.array([len(tokens) for tokens in tokens_batch], dtype=np.int64)
+        if lengths.sum() > 0:
+            # Texts are aligned to the end, padding goes first
+            mask = np.arange(text_size) >= (text_size - lengths)[:, np.newaxis]
+            embeddings_batch[mask] = self.fasttext_model.embed_tokens(list(chain.from_iterable(tokens_batch)))
         return embeddings_batch
 
     def train_on_batch(self, batch):
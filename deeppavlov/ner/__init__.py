@@ -1 +0,0 @@
-from deeppavlov.ner.ner import NerComponent
\ No newline at end of file
@@ -0,0 +1,68 @@
+from deeppavlov.core.components import Component
+from deeppavlov.core.registrable import Registrable
+from deeppavlov.data.gazetteer import Gazetteer
+
+from overrides import overrides
+
+import json
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+@Registrable.register("ner.gazetteer")
+class GazetteerNerComponent(Component):
+    """
+    Tags tokens with slot values from the DSTC2 slot values file. If a ``fallback`` NER component is given
+    in ``init``, its network tags the utterances in which the gazetteer finds nothing.
+    """
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.local_input_names = ['tokens', 'chars']
+        self.local_output_names = ['result']
+
+        self.fallback_name = "fallback"
+
+        self.gazetteer = None
+
+    @overrides
+    def setup(self, components={}):
+        super().setup(components)
+        if self.gazetteer is None:
+            with open(self.config["slot_values"]) as f:
+                self.gazetteer = Gazetteer.from_slot_vals(json.load(f))
+
+    def _fallback_network(self):
+        fallback = self._setup.get(self.fallback_name)
+        return fallback.network if fallback is not None else None
+
+    @overrides
+    def forward(self, smem, add_local_mem=False):
+        self.forward_batch([smem], add_local_mem=add_local_mem)
+
+    @overrides
+    def forward_batch(self, smems, add_local_mem=False):
+        tokens_batch = self.get_batch_input("tokens", smems)
+        # Empty utterances get None, as from NerComponent
+        results = [[self.gazetteer.tag(tokens)] if len(tokens) > 0 else None for tokens in tokens_batch]
+
+        network = self._fallback_network()
+        if network is not None:
+            missed = [n for n, result in enumerate(results)
+                      if result is not None and all(tag == 'O' for tag in result[0])]
+            if missed:
+                chars_batch = self.get_batch_input("chars", [smems[n] for n in missed])
+                predictions = network.infer([tokens_batch[n] for n in missed], chars_batch)
+                for n, prediction in zip(missed, predictions):
+                    results[n] = [prediction]
+                logger.debug("Fallback NER for %s of %s utterances" % (len(missed), len(smems)))
+
+        self.set_batch_output("result", results, smems)
+
+    @overrides
+    def shutdown(self):
+        fallback = self._setup.get(self.fallback_name)
+        if fallback is not None:
+            fallback.shutdown()
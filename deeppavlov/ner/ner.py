@@ -55,6 +55,21 @@ class NerComponent(Component):
 
         self.set_output("result", prediction, smem)
 
+    @overrides
+    def forward_batch(self, smems, add_local_mem=False):
+        tokens_batch = self.get_batch_input("tokens", smems)
+        chars_batch = self.get_batch_input("chars", smems)
+
+        predictions = self.network.infer(tokens_batch, chars_batch)
+
+        results = []
+        for n, tokens in enumerate(tokens_batch):
+            if predictions is None or len(tokens) == 0:
+                results.append(None)
+            else:
+                results.append([predictions[n]])
+        self.set_batch_output("result", results, smems)
+
     @overrides
     def train(self, smem, add_local_mem=False):
 
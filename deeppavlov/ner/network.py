@@ -33,6 +33,46 @@ MODEL_PATH = 'model/'
 MODEL_FILE_NAME = 'ner_model'
 
 
+def viterbi_decode_batch(logits, transition_params, sequence_lengths, padded=False):
+    """
+    Decode the highest scoring tag sequences for a whole batch at once.
+    Args:
+        logits: array [batch_size, max_len, n_tags] of unary potentials
+        transition_params: array [n_tags, n_tags] of binary potentials
+        sequence_lengths: array [batch_size] with the number of valid steps of every sequence
+        padded: return the array [batch_size, max_len] of tag indices, steps after the end of a sequence
+            repeat its last tag
+    Returns:
+        list of tag index lists, one per sequence, each trimmed to the sequence length, or the array if ``padded``
+    """
+    batch_size, max_len, n_tags = logits.shape
+    lengths = np.asarray(sequence_lengths).astype(np.int64)
+    if batch_size == 0 or max_len == 0:
+        return np.zeros([batch_size, max_len], dtype=np.int64) if padded else [[] for _ in range(batch_size)]
+
+    score = logits[:, 0]
+    backpointers = np.empty([batch_size, max(max_len - 1, 0), n_tags], dtype=np.int64)
+    identity = np.arange(n_tags)
+    for t in range(1, max_len):
+        # candidates[b, i, j]: best score of a path ending with tag i at t - 1 followed by tag j at t
+        candidates = score[:, :, np.newaxis] + transition_params[np.newaxis]
+        best_prev = np.argmax(candidates, axis=1)
+        new_score = np.max(candidates, axis=1) + logits[:, t]
+        # Finished sequences keep their score and pass their last tag through the padding unchanged
+        active = (t < lengths)[:, np.newaxis]
+        score = np.where(active, new_score, score)
+        backpointers[:, t - 1] = np.where(active, best_prev, identity)
+
+    tags = np.empty([batch_size, max_len], dtype=np.int64)
+    tags[:, -1] = np.argmax(score, axis=1)
+    rows = np.arange(batch_size)
+    for t in range(max_len - 1, 0, -1):
+        tags[:, t - 1] = backpointers[rows, t - 1, tags[:, t]]
+    if padded:
+        return tags
+    return [tags[n, :lengths[n]].tolist() for n in range(batch_size)]
+
+
 class NerNetwork(TFModel):
 
     def __init__(self,
@@ -185,48 +225,43 @@ class NerNetwork(TFModel):
         saver.restore(self._sess, model_file_path)
 
     def infer(self, tokens_batch, chars_batch):
-        tokens_idxs_batch = self.tokens_vocab.process(tokens_batch)
-        char_idxs_batch = self.chars_vocab.process(chars_batch)
-        prediction_batch = self.predict_on_batch(tokens_idxs_batch, char_idxs_batch)
-        if prediction_batch is not None:
-            result_batch = self.tags_vocab.batch_idxs2batch_toks(prediction_batch)
-        else:
-            result_batch = None
-        return result_batch
-
-    def _prepare_batch(self, tokens_idxs_batch, char_idxs_batch, tags_idxs_batch):
-        batch_size = len(tokens_idxs_batch)
-
-        max_utterance_len = max(len(utt) for utt in tokens_idxs_batch)
+        prediction_batch = self.predict_on_batch(tokens_batch, chars_batch)
+        if prediction_batch is None:
+            return None
+        # Drop predictions for the padding of utterances shorter than the longest one in the batch
+        lengths = [len(tokens) for tokens in tokens_batch]
+        return self.tags_vocab.decode_batch(prediction_batch, lengths)
+
+    def _prepare_batch(self, tokens_batch, chars_batch, tags_batch=None):
+        """
+        Convert a batch of utterances to padded index arrays with one bulk lookup per vocabulary.
+        Returns:
+            tokens [batch_size, max_len], chars [batch_size, max_len, max_token_len], mask [batch_size, max_len]
+            and tags [batch_size, max_len] (zeros if ``tags_batch`` is None), all None if the utterances are empty
+        """
+        tokens_batch_np, utterance_lengths = self.tokens_vocab.encode_batch(tokens_batch)
+        batch_size, max_utterance_len = tokens_batch_np.shape
 
         if max_utterance_len == 0:
             return None, None, None, None
 
-        max_token_len = max(len(token) for token in list(chain(*char_idxs_batch)))
-
-        tokens_batch_np = np.zeros([batch_size, max_utterance_len], dtype=np.int32)
-        tags_batch_np = np.zeros([batch_size, max_utterance_len], dtype=np.int32)
-        mask_np = np.zeros([batch_size, max_utterance_len], dtype=np.int32)
-        chars_batch_np = np.zeros([batch_size, max_utterance_len, max_token_len], dtype=np.int32)
-        for n in range(batch_size):
-            tokens_idxs = tokens_idxs_batch[n]
-            if tags_idxs_batch is not None:
-                tags_idxs = tags_idxs_batch[n]
-            tokens_batch_np[n, :len(tokens_idxs)] = tokens_idxs
-            mask_np[n, :len(tokens_idxs)] = 1
-            if tags_idxs_batch is not None:
-                tags_batch_np[n, :len(tags_idxs)] = tags_idxs
-            for k in range(len(tokens_idxs)):
-                characters = char_idxs_batch[n][k]
-                chars_batch_np[n, k, :len(characters)] = characters
-        return tokens_batch_np, chars_batch_np, mask_np, tags_batch_np
+        # Positions of real tokens, row-major order of the mask matches the order of flattened tokens
+        mask = np.arange(max_utterance_len) < utterance_lengths[:, np.newaxis]
 
-    def train_on_batch(self, tokens_batch, chars_batch, tags_batch):
-        tokens_idxs_batch = self.tokens_vocab.process(tokens_batch)
-        char_idxs_batch = self.chars_vocab.process(chars_batch)
-        tags_idxs_batch = self.chars_vocab.process(tags_batch)
+        if tags_batch is not None:
+            tags_batch_np, _ = self.tags_vocab.encode_batch(tags_batch)
+        else:
+            tags_batch_np = np.zeros([batch_size, max_utterance_len], dtype=np.int32)
+
+        # Character indices of all tokens of the batch, in the order of the tokens
+        token_chars_np, _ = self.chars_vocab.encode_batch(list(chain(*chars_batch)))
+        chars_batch_np = np.zeros([batch_size, max_utterance_len, token_chars_np.shape[1]], dtype=np.int32)
+        chars_batch_np[mask] = token_chars_np
+        return tokens_batch_np, chars_batch_np, mask.astype(np.int32), tags_batch_np
 
-        tokens_batch_np, chars_batch_np, mask_np, tags_batch_np = self._prepare_batch(tokens_idxs_batch, char_idxs_batch, tags_idxs_batch)
+    def train_on_batch(self, tokens_batch, chars_batch, tags_batch):
+        tokens_batch_np, chars_batch_np, mask_np, tags_batch_np = self._prepare_batch(tokens_batch, chars_batch,
+                                                                                      tags_batch)
         if tokens_batch_np is None:
             return None
         loss = self.train(tokens_batch_np, chars_batch_np, mask_np, tags_batch_np)
@@ -291,8 +326,8 @@ class NerNetwork(TFModel):
             results = self.eval_conll(dataset_type='test', short_report=True)
         return results
 
-    def predict_on_batch(self, tokens_idxs_batch, char_idxs_batch):
-        tokens_batch_np, chars_batch_np, mask_np, tags_batch_np = self._prepare_batch(tokens_idxs_batch, char_idxs_batch, None)
+    def predict_on_batch(self, tokens_batch, chars_batch):
+        tokens_batch_np, chars_batch_np, mask_np, tags_batch_np = self._prepare_batch(tokens_batch, chars_batch)
         if tokens_batch_np is None:
             return None
         prediction = self.predict(tokens_batch_np, chars_batch_np)
@@ -301,18 +336,12 @@ class NerNetwork(TFModel):
     def predict(self, x_word, x_char):
         feed_dict = self._fill_feed_dict(x_word, x_char, training=False)
         if self._use_crf:
-            y_pred = []
             logits, trans_params, sequence_lengths = self._sess.run([self._logits,
                                                                      self._trainsition_params,
                                                                      self._sequence_lengths
                                                                      ],
                                                                     feed_dict=feed_dict)
-
-            # iterate over the sentences because no batching in viterbi_decode
-            for logit, sequence_length in zip(logits, sequence_lengths):
-                logit = logit[:int(sequence_length)]  # keep only the valid steps
-                viterbi_seq, viterbi_score = tf.contrib.crf.viterbi_decode(logit, trans_params)
-                y_pred += [viterbi_seq]
+            y_pred = viterbi_decode_batch(logits, trans_params, sequence_lengths, padded=True)
         else:
             y_pred = self._sess.run(self._y_pred, feed_dict=feed_dict)
         return y_pred
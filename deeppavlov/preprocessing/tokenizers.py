@@ -1,6 +1,7 @@
 from deeppavlov.core.components import Component
 from deeppavlov.core.registrable import Registrable
-import spacy
+import multiprocessing
+import threading
 import re
 
 import logging
@@ -35,14 +36,32 @@ def char_tokenizer(tokens):
     return ch_tokens
 
 
-NLP = spacy.load('en')
+_NLP = {}
+_NLP_LOCK = threading.Lock()
 
 
-def spacy_tokenizer(x):
+def get_nlp(blank=False):
+    """
+    Return spacy English pipeline, loaded once per process on first use.
+    Args:
+        blank: load a blank pipeline with the tokenizer only instead of the 'en' model
+    """
+    nlp = _NLP.get(blank)
+    if nlp is None:
+        with _NLP_LOCK:
+            nlp = _NLP.get(blank)
+            if nlp is None:
+                import spacy
+                nlp = spacy.blank('en') if blank else spacy.load('en')
+                _NLP[blank] = nlp
+    return nlp
+
+
+def spacy_tokenizer(x, blank=False):
 
     def _tokenize(text, **kwargs):
         """Tokenize with spacy, placing service words as individual tokens."""
-        return [t.text for t in NLP.tokenizer(text)]
+        return [t.text for t in get_nlp(blank).tokenizer(text)]
 
     def _detokenize(tokens):
         """
@@ -70,6 +89,28 @@ def spacy_tokenizer(x):
                     .format(type(x)))
 
 
+def _spacy_tokenize_texts(args):
+    texts, batch_size, blank = args
+    return [[t.text for t in doc] for doc in get_nlp(blank).tokenizer.pipe(texts, batch_size=batch_size)]
+
+
+def spacy_tokenize_batch(texts, batch_size=1000, pool=None, blank=False):
+    """
+    Tokenize a list of texts with spacy tokenizer pipe.
+    Args:
+        texts: list of str
+        batch_size: number of texts processed by spacy at once
+        pool: ``multiprocessing.Pool`` to split the texts between worker processes
+        blank: use the blank tokenizer-only pipeline
+    Returns:
+        list of token lists
+    """
+    if pool is None or len(texts) <= batch_size:
+        return _spacy_tokenize_texts((texts, batch_size, blank))
+    chunks = [(texts[i:i + batch_size], batch_size, blank) for i in range(0, len(texts), batch_size)]
+    return [tokens for chunk in pool.map(_spacy_tokenize_texts, chunks) for tokens in chunk]
+
+
 @Registrable.register("tokenizer.chars")
 class CharTokenizerComponent(Component):
     def __init__(self, config):
@@ -85,16 +126,58 @@ class CharTokenizerComponent(Component):
 
 @Registrable.register("tokenizer.spacy")
 class SpacyTokenizerComponent(Component):
+    """
+    Tokenizes text with spacy. With "batch" a list of texts is tokenized with the spacy tokenizer pipe and
+    with "n_process" > 1 the texts are split between worker processes. spacy 2.0 has no ``pipe(n_process=...)``,
+    so the component runs its own pool. Workers are started with the "spawn" method: forking a process which
+    already runs TF sessions and thread pools of the pipeline can deadlock the children on locks held by
+    other threads at the moment of the fork.
+    """
+
     def __init__(self, config):
         super().__init__(config)
         self.local_input_names = ['text']
         self.local_output_names = ['tokens']
 
+        # With "batch" a list in the input is treated as a list of texts to tokenize, not as tokens to detokenize
+        self.batch = self.config["batch"] if "batch" in self.config else False
+        self.batch_size = self.config["batch_size"] if "batch_size" in self.config else 1000
+        self.n_process = self.config["n_process"] if "n_process" in self.config else 1
+        # Tokenizer-only pipeline, much faster to load than the full model
+        self.blank = self.config["blank"] if "blank" in self.config else False
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self):
+        if self.n_process > 1 and self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = multiprocessing.get_context("spawn").Pool(self.n_process)
+        return self._pool
+
+    def tokenize_batch(self, texts):
+        return spacy_tokenize_batch(texts, self.batch_size, self._get_pool(), self.blank)
+
     def forward(self, shared_mem, add_local_mem=False):
         text = self.get_input('text', shared_mem)
-        tokens = spacy_tokenizer(text)
+        if self.batch and isinstance(text, list):
+            tokens = self.tokenize_batch(text)
+        else:
+            tokens = spacy_tokenizer(text, self.blank)
         self.set_output('tokens', tokens, shared_mem)
 
+    def forward_batch(self, shared_mems, add_local_mem=False):
+        texts = self.get_batch_input('text', shared_mems)
+        if not all(isinstance(text, str) for text in texts):
+            return super().forward_batch(shared_mems, add_local_mem=add_local_mem)
+        self.set_batch_output('tokens', self.tokenize_batch(texts), shared_mems)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
 
 @Registrable.register("tokenizer.nltk")
 class NLTKTokenizerComponent(Component):
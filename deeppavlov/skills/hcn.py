@@ -19,6 +19,13 @@ class HcnComponent(Component):
 
         self._is_network_initialized = False
 
+        # With dialog_batch_size > 0 the network is trained on batches of whole dialogs instead of single turns
+        self.dialog_batch_size = self.config["dialog_batch_size"] if "dialog_batch_size" in self.config else 0
+        self._dialogs = []
+
+        # Shared memory key with the conversation id, to serve many conversations with one bot
+        self.session_key = self.config["session_key"] if "session_key" in self.config else None
+
         self.hcn = None
 
     @overrides
@@ -29,6 +36,7 @@ class HcnComponent(Component):
 
     @overrides
     def save(self):
+        self._flush_dialogs()
         if "save_to" in self.config:
             path = self.config["save_to"]
             # self.network.save(path)
@@ -49,10 +57,37 @@ class HcnComponent(Component):
 
         classes = self.get_input("classes", smem)
 
-        result = self.hcn.infer_on_batch(bow, emb, entities, classes)
+        if self.session_key is not None:
+            result = self.hcn.infer_sessions([smem[self.session_key]], [bow], [emb], [entities], [classes])[0]
+        else:
+            result = self.hcn.infer_on_batch(bow, emb, entities, classes)
 
         self.set_output("result", result, smem)
 
+    @overrides
+    def forward_batch(self, smems, add_local_mem=False):
+        if self.session_key is None:
+            return super().forward_batch(smems, add_local_mem=add_local_mem)
+
+        # Turns of the same conversation are made in order, one per LSTM step
+        pending = list(smems)
+        while pending:
+            step, seen, rest = [], set(), []
+            for smem in pending:
+                session_id = smem[self.session_key]
+                if session_id in seen:
+                    rest.append(smem)
+                else:
+                    seen.add(session_id)
+                    step.append(smem)
+            results = self.hcn.infer_sessions([smem[self.session_key] for smem in step],
+                                              self.get_batch_input("bow", step),
+                                              self.get_batch_input("emb", step),
+                                              self.get_batch_input("entities", step),
+                                              self.get_batch_input("classes", step))
+            self.set_batch_output("result", results, step)
+            pending = rest
+
     @overrides
     def train(self, smem, add_local_mem=False):
 
@@ -72,15 +107,34 @@ class HcnComponent(Component):
         # logger.debug("EMB: %s" % emb)
         # logger.debug("Entities: %s" % entities)
 
-        loss = self.hcn.train_on_batch(bow, emb, entities, classes, response, other)
+        if self.dialog_batch_size > 0:
+            loss = self._train_on_dialog_turn(bow, emb, entities, classes, response, other)
+        else:
+            loss = self.hcn.train_on_batch(bow, emb, entities, classes, response, other)
 
         self.set_output("result", loss, smem)
         logger.debug("Loss %s" % loss)
 
+    def _train_on_dialog_turn(self, bow, emb, entities, classes, response, other):
+        loss = None
+        if other.get('episode_done') or not self._dialogs:
+            # all buffered dialogs are complete when a new one starts
+            if len(self._dialogs) >= self.dialog_batch_size:
+                loss = self._flush_dialogs()
+            self._dialogs.append([])
+        self._dialogs[-1].append(self.hcn.encode_dialog_turn(bow, emb, entities, classes, response, other))
+        return loss
+
+    def _flush_dialogs(self):
+        dialogs = [dialog for dialog in self._dialogs if dialog]
+        self._dialogs = []
+        if dialogs:
+            return self.hcn.train_on_dialogs(dialogs)
+
     @overrides
     def shutdown(self):
-        pass
-        # self.network.shutdown()
+        if self.hcn is not None:
+            self.hcn.shutdown()
 
 """
 Copyright 2017 Neural Networks and Deep Learning lab, MIPT
@@ -98,10 +152,12 @@ limitations under the License.
 import re
 
 import numpy as np
+from scipy import sparse
 
 from deeppavlov.skills.tracker import FeaturizedTracker
 from deeppavlov.skills.metrics import DialogMetrics
 from deeppavlov.skills.network import HybridCodeNetworkModel
+from deeppavlov.skills.sessions import DialogState, session_backend
 from deeppavlov.skills.templates import Templates, DualTemplate
 
 
@@ -148,6 +204,10 @@ class HybridCodeNetworkBot:
         self.n_intents = int(config["intents_size"]) # len(self.intent_classifier.infer(['hi']))
         self.prev_action = np.zeros(self.n_actions, dtype=np.float32)
 
+        # states of concurrent conversations served with infer_sessions
+        self.sessions = session_backend(config["sessions"] if "sessions" in config else None,
+                                        config["session_ttl"] if "session_ttl" in config else 3600.)
+
         # initialize metrics
         self.metrics = DialogMetrics(self.n_actions)
 
@@ -191,7 +251,7 @@ class HybridCodeNetworkBot:
                                     dtype=np.float32)
 
         if self.debug:
-            print("num bow features =", len(bow),
+            print("num bow features =", bow.shape[-1],
                   " num emb features =", len(emb),
                   " num intent features =", len(classes),
                   " num state features =", len(state_features),
@@ -200,6 +260,15 @@ class HybridCodeNetworkBot:
 
         classes = classes[0] if len(classes.shape) == 2 else classes
 
+        if sparse.issparse(bow):
+            # Scatter the sparse bag-of-words into the feature vector without densifying it first
+            n_bow = bow.shape[-1]
+            dense_features = np.hstack((emb, classes, state_features, context_features, self.prev_action))
+            features = np.zeros(n_bow + len(dense_features), dtype=np.float32)
+            features[bow.indices] = bow.data
+            features[n_bow:] = dense_features
+            return features[np.newaxis, :]
+
         return np.hstack((bow, emb, classes, state_features, context_features, self.prev_action))[np.newaxis, :]
 
     def _encode_response(self, response, act):
@@ -266,6 +335,37 @@ class HybridCodeNetworkBot:
         #     print("State =", self.tracker.get_state())
         #     print("db_result =", self.db_result)
 
+    def encode_dialog_turn(self, bow, emb, entities, classes, response, other):
+        """
+        Encode a training turn for ``train_on_dialogs``. Features of all turns of a dialog are computed before
+        the network runs on it, so the true previous action is used as a feature instead of the predicted one.
+        Returns:
+            (features, action_id)
+        """
+        if other.get('episode_done'):
+            self.reset()
+            self.metrics.n_dialogs += 1
+
+        if other.get('db_result') is not None:
+            self.db_result = other['db_result']
+        action_id = self._encode_response(response, other['act'])
+
+        features = self._encode_context(bow, emb, entities, classes, other.get('db_result'))[0]
+
+        self.prev_action *= 0.
+        self.prev_action[action_id] = 1.
+        return features, action_id
+
+    def train_on_dialogs(self, dialogs):
+        """
+        Make one training step on a batch of dialogs encoded with ``encode_dialog_turn``.
+        Args:
+            dialogs: list of lists of (features, action_id)
+        Returns:
+            mean loss over the turns
+        """
+        return self.network.train_on_dialogs(dialogs)
+
     def train(self, data):
         print('\n:: training started')
 
@@ -341,6 +441,70 @@ class HybridCodeNetworkBot:
         self.prev_action[pred_id] = 1.
         return pred_id
 
+    def initial_state(self):
+        return DialogState.initial(self.n_actions, self.network.n_hidden)
+
+    def get_state(self):
+        """Return the state of the current conversation"""
+        return DialogState(history=list(self.tracker.history),
+                           db_result=self.db_result,
+                           prev_action=self.prev_action.copy(),
+                           state_c=self.network.state_c[0].copy(),
+                           state_h=self.network.state_h[0].copy())
+
+    def set_state(self, state):
+        """Continue the conversation with the given state"""
+        self.tracker.reset_state()
+        self.tracker.history = list(state.history)
+        self.db_result = state.db_result
+        self.prev_action = state.prev_action.copy()
+        self.network.state_c = state.state_c[np.newaxis, :].copy()
+        self.network.state_h = state.state_h[np.newaxis, :].copy()
+
+    def infer_sessions(self, session_ids, bows, embs, entities, classes, db_results=None):
+        """
+        Make a turn in several conversations at once with a single LSTM step. States of the conversations
+        are kept in ``self.sessions``, a new conversation starts for an unknown session id.
+        Args:
+            session_ids: ids of the conversations, should be unique
+            bows, embs, entities, classes: features of the utterances
+            db_results: database results of the turns
+        Returns:
+            list of predicted action ids
+        """
+        if len(set(session_ids)) != len(session_ids):
+            raise ValueError("A batch should contain at most one turn of each session")
+        db_results = db_results or [None] * len(session_ids)
+
+        current_state = self.get_state()
+        states, features, action_masks = [], [], []
+        try:
+            for session_id, bow, emb, ents, cls, db_result in zip(session_ids, bows, embs, entities, classes,
+                                                                  db_results):
+                self.set_state(self.sessions.get(session_id) or self.initial_state())
+                if db_result is not None:
+                    self.db_result = db_result
+                features.append(self._encode_context(bow, emb, ents, cls, db_result)[0])
+                action_masks.append(self._action_mask())
+                states.append(self.get_state())
+        finally:
+            self.set_state(current_state)
+
+        probs, pred_ids, states_c, states_h = self.network.forward_batch(
+            np.stack(features),
+            np.stack(action_masks),
+            np.stack([state.state_c for state in states]),
+            np.stack([state.state_h for state in states])
+        )
+
+        for n, (session_id, state) in enumerate(zip(session_ids, states)):
+            state.state_c = states_c[n]
+            state.state_h = states_h[n]
+            state.prev_action = np.zeros(self.n_actions, dtype=np.float32)
+            state.prev_action[pred_ids[n]] = 1.
+            self.sessions.put(session_id, state)
+        return [int(pred_id) for pred_id in pred_ids]
+
     def infer(self, context, db_result=None):
         if db_result is not None:
             self.db_result = db_result
@@ -400,6 +564,7 @@ class HybridCodeNetworkBot:
 
     def shutdown(self):
         self.network.shutdown()
+        self.sessions.close()
         # self.slot_filler.shutdown()
 
     def load(self):
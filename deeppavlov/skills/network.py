@@ -19,6 +19,26 @@ from tensorflow.contrib.layers import xavier_initializer
 from deeppavlov.core.tf_backend import TFModel
 
 
+class _StateOutputCell(tf.contrib.rnn.RNNCell):
+    """Wraps an LSTM cell to output its full state (c, h) concatenated, as the output layer uses both"""
+
+    def __init__(self, cell):
+        super().__init__()
+        self._cell = cell
+
+    @property
+    def state_size(self):
+        return self._cell.state_size
+
+    @property
+    def output_size(self):
+        return self._cell.output_size * 2
+
+    def call(self, inputs, state):
+        _, next_state = self._cell(inputs, state)
+        return tf.concat(axis=1, values=(next_state.c, next_state.h)), next_state
+
+
 class HybridCodeNetworkModel(TFModel):
 
     def __init__(self, params):
@@ -68,20 +88,36 @@ class HybridCodeNetworkModel(TFModel):
             logits=_logits, labels=self._action, name='loss'
         )
         self._step = tf.Variable(0, trainable=False, name='global_step')
-        self._train_op = tf.train.AdadeltaOptimizer(self.learning_rate)\
-            .minimize(self._loss, global_step=self._step, name='train_op')
+        optimizer = tf.train.AdadeltaOptimizer(self.learning_rate)
+        self._train_op = optimizer.minimize(self._loss, global_step=self._step, name='train_op')
+
+        # the same weights and optimizer slots trained on padded batches of whole dialogs
+        self._batch_loss = self._build_batch_loss()
+        self._batch_train_op = optimizer.minimize(self._batch_loss, global_step=self._step,
+                                                  name='batch_train_op')
 
     def _add_placeholders(self):
-        self._features = tf.placeholder(tf.float32, [1, self.obs_size],
+        self._features = tf.placeholder(tf.float32, [None, self.obs_size],
                                         name='features')
-        self._state_c = tf.placeholder(tf.float32, [1, self.n_hidden],
+        self._state_c = tf.placeholder(tf.float32, [None, self.n_hidden],
                                        name='state_c')
-        self._state_h = tf.placeholder(tf.float32, [1, self.n_hidden],
+        self._state_h = tf.placeholder(tf.float32, [None, self.n_hidden],
                                        name='state_h')
         self._action = tf.placeholder(tf.int32,
                                       name='ground_truth_action')
         self._action_mask = tf.placeholder(tf.float32, [self.n_actions],
                                            name='action_mask')
+        # action masks of several conversations making a step at once
+        self._action_masks = tf.placeholder(tf.float32, [None, self.n_actions],
+                                            name='action_masks')
+
+        # batch of dialogs: [batch_size, max_num_turns, ...]
+        self._batch_features = tf.placeholder(tf.float32, [None, None, self.obs_size],
+                                              name='batch_features')
+        self._batch_action = tf.placeholder(tf.int32, [None, None],
+                                            name='batch_ground_truth_action')
+        self._batch_turn_mask = tf.placeholder(tf.float32, [None, None],
+                                               name='batch_turn_mask')
 
     def _build_body(self):
         # input projection
@@ -94,6 +130,7 @@ class HybridCodeNetworkModel(TFModel):
         _projected_features = tf.matmul(self._features, _Wi) + _bi
 
         _lstm_f = tf.contrib.rnn.LSTMCell(self.n_hidden, state_is_tuple=True)
+        self._lstm = _lstm_f
         _lstm_op, self._next_state = _lstm_f(inputs=_projected_features,
                                              state=(self._state_c,
                                                     self._state_h))
@@ -108,14 +145,43 @@ class HybridCodeNetworkModel(TFModel):
                               initializer=xavier_initializer())
         _bo = tf.get_variable('bo', [self.n_actions],
                               initializer=tf.constant_initializer(0.))
+        self._projections = (_Wi, _bi, _Wo, _bo)
         # get logits
         _logits = tf.matmul(_state_reshaped, _Wo) + _bo
         # probabilities normalization : elemwise multiply with action mask
         self._probs = tf.multiply(tf.squeeze(tf.nn.softmax(_logits)),
                                   self._action_mask,
                                   name='probs')
+        self._batch_probs = tf.multiply(tf.nn.softmax(_logits),
+                                        self._action_masks,
+                                        name='batch_probs')
+        self._batch_prediction = tf.argmax(self._batch_probs, axis=1, name='batch_prediction')
         return _logits
 
+    def _build_batch_loss(self):
+        _Wi, _bi, _Wo, _bo = self._projections
+        _batch_size = tf.shape(self._batch_features)[0]
+        _max_turns = tf.shape(self._batch_features)[1]
+
+        _features = tf.reshape(self._batch_features, [-1, self.obs_size])
+        _projected_features = tf.reshape(tf.matmul(_features, _Wi) + _bi,
+                                         [_batch_size, _max_turns, self.n_hidden])
+
+        _lengths = tf.to_int32(tf.reduce_sum(self._batch_turn_mask, axis=1))
+        _states, _ = tf.nn.dynamic_rnn(_StateOutputCell(self._lstm),
+                                       _projected_features,
+                                       sequence_length=_lengths,
+                                       dtype=tf.float32)
+
+        _logits = tf.matmul(tf.reshape(_states, [-1, self.n_hidden * 2]), _Wo) + _bo
+        _loss = tf.nn.sparse_softmax_cross_entropy_with_logits(
+            logits=_logits, labels=tf.reshape(self._batch_action, [-1])
+        )
+        _turn_mask = tf.reshape(self._batch_turn_mask, [-1])
+        return tf.divide(tf.reduce_sum(_loss * _turn_mask),
+                         tf.maximum(tf.reduce_sum(_turn_mask), 1.),
+                         name='batch_loss')
+
     def reset_state(self):
         # set zero state
         self.state_c = np.zeros([1, self.n_hidden], dtype=np.float32)
@@ -138,6 +204,36 @@ class HybridCodeNetworkModel(TFModel):
             )
         return loss_value[0], prediction
 
+    def train_on_dialogs(self, dialogs):
+        """
+        Make one optimizer step on a batch of dialogs.
+        Args:
+            dialogs: list of dialogs, a dialog is a list of (features, action_id) turns
+        Returns:
+            mean loss over all turns of the batch
+        """
+        batch_size = len(dialogs)
+        max_num_turns = max(len(dialog) for dialog in dialogs)
+        features = np.zeros([batch_size, max_num_turns, self.obs_size], dtype=np.float32)
+        actions = np.zeros([batch_size, max_num_turns], dtype=np.int32)
+        turn_mask = np.zeros([batch_size, max_num_turns], dtype=np.float32)
+        for n, dialog in enumerate(dialogs):
+            if dialog:
+                dialog_features, dialog_actions = zip(*dialog)
+                features[n, :len(dialog)] = np.reshape(dialog_features, [len(dialog), self.obs_size])
+                actions[n, :len(dialog)] = dialog_actions
+                turn_mask[n, :len(dialog)] = 1.
+
+        _, loss_value = self.sess.run(
+            [self._batch_train_op, self._batch_loss],
+            feed_dict={
+                self._batch_features: features,
+                self._batch_action: actions,
+                self._batch_turn_mask: turn_mask
+            }
+        )
+        return loss_value
+
     def _forward(self, features, action_mask):
         probs, prediction, self.state_c, self.state_h = \
             self.sess.run(
@@ -154,5 +250,28 @@ class HybridCodeNetworkModel(TFModel):
             )
         return probs, prediction
 
+    def forward_batch(self, features, action_masks, state_c, state_h):
+        """
+        Make one LSTM step for several independent conversations.
+        Args:
+            features: array [batch_size, obs_size]
+            action_masks: array [batch_size, action_size]
+            state_c, state_h: LSTM states of the conversations, arrays [batch_size, hidden_dim]
+        Returns:
+            probs, predictions, next state_c and next state_h of the conversations
+        """
+        return self.sess.run(
+            [
+                self._batch_probs, self._batch_prediction, self._next_state.c,
+                self._next_state.h
+            ],
+            feed_dict={
+                self._features: features,
+                self._state_c: state_c,
+                self._state_h: state_h,
+                self._action_masks: action_masks
+            }
+        )
+
     def shutdown(self):
         self.sess.close()
\ No newline at end of file
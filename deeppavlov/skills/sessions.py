@@ -0,0 +1,211 @@
+"""
+Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
+import base64
+import json
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+
+def _encode_array(array):
+    return base64.b64encode(np.asarray(array, dtype=np.float32).tobytes()).decode('ascii')
+
+
+def _decode_array(s):
+    return np.frombuffer(base64.b64decode(s), dtype=np.float32).copy()
+
+
+class DialogState:
+    """
+    State of one conversation of ``HybridCodeNetworkBot``: slots history of the tracker, last database
+    result, one-hot previous action and LSTM state.
+    """
+
+    def __init__(self, history, db_result, prev_action, state_c, state_h):
+        self.history = history
+        self.db_result = db_result
+        self.prev_action = prev_action
+        self.state_c = state_c
+        self.state_h = state_h
+
+    @classmethod
+    def initial(cls, n_actions, n_hidden):
+        return cls(history=[],
+                   db_result=None,
+                   prev_action=np.zeros(n_actions, dtype=np.float32),
+                   state_c=np.zeros(n_hidden, dtype=np.float32),
+                   state_h=np.zeros(n_hidden, dtype=np.float32))
+
+    def serialize(self):
+        """
+        Compact JSON snapshot of the state: the one-hot previous action is stored as an index and
+        LSTM state vectors as base64 encoded float32 bytes.
+        """
+        return json.dumps({
+            "history": self.history,
+            "db_result": self.db_result,
+            "n_actions": len(self.prev_action),
+            "prev_action": int(np.argmax(self.prev_action)) if np.any(self.prev_action) else None,
+            "state_c": _encode_array(self.state_c),
+            "state_h": _encode_array(self.state_h)
+        }, separators=(',', ':'))
+
+    @classmethod
+    def deserialize(cls, s):
+        snapshot = json.loads(s)
+        prev_action = np.zeros(snapshot["n_actions"], dtype=np.float32)
+        if snapshot["prev_action"] is not None:
+            prev_action[snapshot["prev_action"]] = 1.
+        return cls(history=[tuple(item) for item in snapshot["history"]],
+                   db_result=snapshot["db_result"],
+                   prev_action=prev_action,
+                   state_c=_decode_array(snapshot["state_c"]),
+                   state_h=_decode_array(snapshot["state_h"]))
+
+
+class SessionBackend(metaclass=ABCMeta):
+    """
+    Storage of dialog states by session id. Backends keeping states outside of the process let any worker
+    continue any conversation.
+    """
+
+    @abstractmethod
+    def get(self, session_id):
+        """Return the state of the session or None for unknown or expired sessions"""
+
+    @abstractmethod
+    def put(self, session_id, state):
+        pass
+
+    @abstractmethod
+    def delete(self, session_id):
+        pass
+
+    def close(self):
+        pass
+
+
+class SessionStore(SessionBackend):
+    """
+    Thread-safe in-memory store of dialog states by session id. Sessions not accessed for ``ttl`` seconds
+    are evicted.
+    """
+
+    def __init__(self, ttl=3600.):
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict_expired(self, now):
+        if self.ttl is None:
+            return
+        while self._sessions:
+            session_id, (accessed, _) = next(iter(self._sessions.items()))
+            if now - accessed <= self.ttl:
+                break
+            del self._sessions[session_id]
+
+    def get(self, session_id):
+        now = time.time()
+        with self._lock:
+            self._evict_expired(now)
+            item = self._sessions.get(session_id)
+            if item is None:
+                return None
+            self._sessions[session_id] = (now, item[1])
+            self._sessions.move_to_end(session_id)
+            return item[1]
+
+    def put(self, session_id, state):
+        now = time.time()
+        with self._lock:
+            self._evict_expired(now)
+            self._sessions[session_id] = (now, state)
+            self._sessions.move_to_end(session_id)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        with self._lock:
+            self._evict_expired(time.time())
+            return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionBackend):
+    """
+    Dialog states serialized into an SQLite database file, which can be shared by several worker processes.
+    Session ids are stored as strings. Sessions not accessed for ``ttl`` seconds are evicted.
+    """
+
+    def __init__(self, path, ttl=3600.):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=30., check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS sessions "
+                                     "(id TEXT PRIMARY KEY, accessed REAL, state TEXT)")
+            # Expired sessions are deleted on every get and put
+            self._connection.execute("CREATE INDEX IF NOT EXISTS sessions_accessed ON sessions (accessed)")
+
+    def _evict_expired(self, now):
+        if self.ttl is not None:
+            self._connection.execute("DELETE FROM sessions WHERE accessed < ?", (now - self.ttl,))
+
+    def get(self, session_id):
+        now = time.time()
+        with self._lock, self._connection:
+            self._evict_expired(now)
+            row = self._connection.execute("SELECT state FROM sessions WHERE id = ?",
+                                           (str(session_id),)).fetchone()
+            if row is None:
+                return None
+            self._connection.execute("UPDATE sessions SET accessed = ? WHERE id = ?", (now, str(session_id)))
+        return DialogState.deserialize(row[0])
+
+    def put(self, session_id, state):
+        snapshot = state.serialize()
+        now = time.time()
+        with self._lock, self._connection:
+            self._evict_expired(now)
+            self._connection.execute("INSERT OR REPLACE INTO sessions (id, accessed, state) VALUES (?, ?, ?)",
+                                     (str(session_id), now, snapshot))
+
+    def delete(self, session_id):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM sessions WHERE id = ?", (str(session_id),))
+
+    def close(self):
+        self._connection.close()
+
+
+def session_backend(config=None, ttl=3600.):
+    """
+    Create a session backend from config: None or {"backend": "memory"} for ``SessionStore``,
+    {"backend": "sqlite", "path": ...} for ``SQLiteSessionStore``. The config can override ``ttl``.
+    """
+    config = config or {}
+    backend = config["backend"] if "backend" in config else "memory"
+    ttl = config["ttl"] if "ttl" in config else ttl
+    if backend == "memory":
+        return SessionStore(ttl)
+    if backend == "sqlite":
+        return SQLiteSessionStore(config["path"], ttl)
+    raise ValueError("Unknown session backend %s" % backend)
@@ -0,0 +1,109 @@
+import os
+
+import numpy as np
+
+from deeppavlov.testing.test_case import DPTestCase
+from deeppavlov.core.components import DatasetProviderWrapper
+from deeppavlov.core.data import DatasetReader, DatasetProvider
+
+
+class LinesReader(DatasetReader):
+
+    @staticmethod
+    def sources(data_path=None):
+        return [data_path]
+
+    @staticmethod
+    def read(data_path, *args, **kwargs):
+        with open(data_path) as f:
+            return {"train": [(line.split(), len(line.split())) for line in f]}
+
+
+class CountingProvider(DatasetProvider):
+    builds = 0
+
+    def __init__(self, data, seed, *args, **kwargs):
+        CountingProvider.builds += 1
+        super().__init__(data, seed)
+        self.lengths = np.array([y for _, y in self.train], dtype=np.int32)
+
+
+class StopWordsProvider(DatasetProvider):
+    stop_words_path = None
+
+    @classmethod
+    def cache_sources(cls):
+        return [cls.stop_words_path]
+
+    def __init__(self, data, seed, *args, **kwargs):
+        super().__init__(data, seed)
+        with open(self.stop_words_path) as f:
+            stop_words = set(f.read().split())
+        self.train = [([t for t in x if t not in stop_words], y) for x, y in self.train]
+        self.data = {"train": self.train}
+
+
+class TestProviderCache(DPTestCase):
+
+    def _wrapper(self, data_path, provider=CountingProvider, cache_dir=None):
+        return DatasetProviderWrapper({
+            "reader": __name__ + ".LinesReader",
+            "provider": provider,
+            "data_path": data_path,
+            "cache_dir": cache_dir or os.path.join(self.TEST_DIR, "cache"),
+            "batch_size": 2,
+            "out": ["x", "y"]
+        })
+
+    def _write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def test_cache(self):
+        data_path = os.path.join(self.TEST_DIR, "data.txt")
+        self._write(data_path, "cheap restaurant\nwest part of town\nbye\n")
+        CountingProvider.builds = 0
+
+        built = self._wrapper(data_path).provider
+        cached = self._wrapper(data_path).provider
+        assert CountingProvider.builds == 1
+        assert isinstance(cached, CountingProvider)
+        assert cached.data == built.data
+        assert cached.train is cached.data["train"]
+        assert cached.train[0] == (["cheap", "restaurant"], 2)
+        assert cached.lengths.dtype == np.int32 and cached.lengths.tolist() == [2, 4, 1]
+        assert list(cached.batch_generator(2)) == list(built.batch_generator(2))
+
+        self._write(data_path, "cheap restaurant\n")
+        changed = self._wrapper(data_path).provider
+        assert CountingProvider.builds == 2
+        assert changed.train == [(["cheap", "restaurant"], 2)]
+
+    def test_cache_sources(self):
+        data_path = os.path.join(self.TEST_DIR, "data.txt")
+        self._write(data_path, "the cheap restaurant\n")
+        StopWordsProvider.stop_words_path = os.path.join(self.TEST_DIR, "stop_words.txt")
+        self._write(StopWordsProvider.stop_words_path, "the\n")
+
+        assert self._wrapper(data_path, StopWordsProvider).provider.train == [(["cheap", "restaurant"], 3)]
+        self._write(StopWordsProvider.stop_words_path, "cheap\n")
+        assert self._wrapper(data_path, StopWordsProvider).provider.train == [(["the", "restaurant"], 3)]
+
+    def test_module_dependencies(self):
+        from deeppavlov.core.cache import _module_dependencies
+        from deeppavlov.data.dstc2 import DSTC2Reader, DSTC2NerProvider
+
+        modules = _module_dependencies([DSTC2Reader.__module__, DSTC2NerProvider.__module__])
+        assert "deeppavlov.data.gazetteer" in modules and "deeppavlov.data.utils" in modules
+        assert "deeppavlov.core.data" in modules
+
+    def test_unwritable_cache_dir(self):
+        data_path = os.path.join(self.TEST_DIR, "data.txt")
+        self._write(data_path, "cheap restaurant\n")
+        cache_dir = os.path.join(self.TEST_DIR, "not_a_dir")
+        self._write(cache_dir, "")
+        CountingProvider.builds = 0
+
+        assert self._wrapper(data_path, cache_dir=cache_dir).provider.train == [(["cheap", "restaurant"], 2)]
+        self._wrapper(data_path, cache_dir=cache_dir)
+        assert CountingProvider.builds == 2
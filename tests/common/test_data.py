@@ -0,0 +1,41 @@
+from deeppavlov.testing.test_case import DPTestCase
+from deeppavlov.core.data import DatasetProvider
+
+
+class TestDatasetProvider(DPTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.samples = [(['w'] * (n % 7 + 1), n) for n in range(50)]
+
+    def _epoch(self, provider, batch_size=4):
+        return [batch for batch in provider.batch_generator(batch_size)]
+
+    def test_batch_generator(self):
+        batches = self._epoch(DatasetProvider({'train': self.samples}, 1))
+        assert len(batches) == 13
+        assert sorted(y for batch in batches for y in batch[1]) == list(range(50))
+
+    def test_bucket_boundaries(self):
+        provider = DatasetProvider({'train': self.samples}, 1)
+        provider.set_bucketing(bucket_boundaries=[2, 4])
+        batches = self._epoch(provider)
+
+        assert sorted(y for batch in batches for y in batch[1]) == list(range(50))
+        for x_batch, _ in batches:
+            lengths = [len(x) for x in x_batch]
+            assert max(lengths) <= 2 or min(lengths) > 4 or (min(lengths) > 2 and max(lengths) <= 4)
+
+        same_seed = DatasetProvider({'train': self.samples}, 1)
+        same_seed.set_bucketing(bucket_boundaries=[2, 4])
+        assert self._epoch(same_seed) == batches
+        assert self._epoch(provider) != batches
+
+    def test_sort_window(self):
+        provider = DatasetProvider({'train': self.samples}, 1)
+        provider.set_bucketing(sort_window=25)
+        batches = self._epoch(provider, batch_size=2)
+
+        assert sorted(y for batch in batches for y in batch[1]) == list(range(50))
+        # all samples fit into one window, so batches are slices of the data sorted by length
+        assert all(max(map(len, x_batch)) - min(map(len, x_batch)) <= 1 for x_batch, _ in batches)
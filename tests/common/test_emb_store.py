@@ -0,0 +1,88 @@
+import numpy as np
+
+from deeppavlov.testing.test_case import DPTestCase
+from deeppavlov.core.emb_store import EmbeddingStore, save_embeddings, save_ngrams
+
+
+class TestEmbeddingStore(DPTestCase):
+
+    def test_store(self):
+        path = self.TEST_DIR + "/emb/store"
+        matrix = np.arange(6, dtype=np.float64).reshape([3, 2])
+        save_embeddings(path, ['cheap', 'west', 'town'], matrix, dtype=np.float16)
+        assert EmbeddingStore.exists(path)
+
+        store = EmbeddingStore(path)
+        assert isinstance(store.matrix, np.memmap)
+        assert len(store) == 3 and store.dim == 2
+        assert 'west' in store and 'moscow' not in store
+        assert store['west'].dtype == np.float32
+        assert store['west'].tolist() == [2., 3.]
+        assert store[['town', 'cheap']].tolist() == [[4., 5.], [0., 1.]]
+        assert store.vector('moscow').tolist() == [0., 0.]
+        assert store.vectors(['moscow', 'town']).tolist() == [[0., 0.], [4., 5.]]
+        with self.assertRaises(KeyError):
+            store['moscow']
+
+    def test_ngrams(self):
+        from gensim.models.wrappers.fasttext import FastTextKeyedVectors
+        from gensim.models.keyedvectors import Vocab
+
+        rng = np.random.RandomState(0)
+        ngrams = ['<ch', 'che', 'hea', 'eap', 'ap>', '<we', 'wes', 'est', 'st>', '<che', 'heap']
+        ngram_matrix = rng.randn(len(ngrams), 4).astype(np.float32)
+        words = ['cheap', 'west']
+        matrix = rng.randn(len(words), 4).astype(np.float32)
+
+        path = self.TEST_DIR + "/emb/fasttext"
+        save_embeddings(path, words, matrix)
+        assert EmbeddingStore.exists(path) and not EmbeddingStore.exists(path, ngrams=True)
+        save_ngrams(path, ngrams, ngram_matrix, 3, 4)
+        assert EmbeddingStore.exists(path, ngrams=True)
+        store = EmbeddingStore(path)
+
+        # Reference: vectors gensim's fastText wrapper computes for the same model
+        wv = FastTextKeyedVectors()
+        wv.syn0 = matrix
+        wv.index2word = words
+        wv.vocab = {word: Vocab(index=i, count=1) for i, word in enumerate(words)}
+        wv.syn0_ngrams = ngram_matrix
+        wv.ngrams = {ngram: i for i, ngram in enumerate(ngrams)}
+        wv.min_n, wv.max_n = 3, 4
+
+        tokens = ['cheap', 'cheapest', 'westest', 'chap', 'moscow', 'cheap']
+        expected = []
+        for token in tokens:
+            try:
+                expected.append(wv.word_vec(token))
+            except KeyError:
+                expected.append(np.zeros(4, dtype=np.float32))
+        expected = np.stack(expected)
+
+        assert 'cheapest' in store and 'moscow' not in store
+        assert np.allclose(store.vectors(tokens), expected, atol=1e-6)
+        assert np.allclose(np.stack([store.vector(token) for token in tokens]), expected, atol=1e-6)
+        assert np.allclose(store['westest'], wv.word_vec('westest'), atol=1e-6)
+        assert expected[1].any() and expected[3].any() and not expected[4].any()
+        with self.assertRaises(KeyError):
+            store['moscow']
+
+    def test_save_after_mmap_load(self):
+        from deeppavlov.core.emb import W2VEmbComponent
+
+        src = self.TEST_DIR + "/emb/w2v"
+        dst = self.TEST_DIR + "/saved/w2v"
+        save_embeddings(src, ['cheap', 'west'], np.array([[1., 2.], [3., 4.]]), dtype=np.float16)
+
+        cmp = W2VEmbComponent({"mmap": True, "dim": 2, "load": src, "save_to": dst})
+        cmp.setup()
+        assert isinstance(cmp.emb.model, EmbeddingStore)
+        cmp.save()
+        saved = EmbeddingStore(dst)
+        assert saved.matrix.dtype == np.float16
+        assert saved[['west', 'cheap']].tolist() == [[3., 4.], [1., 2.]]
+
+        # saving over the loaded files keeps them
+        cmp.config["save_to"] = src
+        cmp.save()
+        assert EmbeddingStore(src)['west'].tolist() == [3., 4.]
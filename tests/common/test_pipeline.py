@@ -0,0 +1,120 @@
+from deeppavlov.testing.test_case import DPTestCase
+from deeppavlov.core.components import Component, Pipeline, init_component
+from deeppavlov.core.registrable import Registrable
+
+
+@Registrable.register("test.upper")
+class UpperComponent(Component):
+    def __init__(self, config):
+        super().__init__(config)
+        self.local_input_names = ['text']
+        self.local_output_names = ['upper']
+        self.setup_calls = 0
+
+    def setup(self, components={}):
+        super().setup(components)
+        self.setup_calls += 1
+
+    def forward(self, smem, add_local_mem=False):
+        self.set_output('upper', self.get_input('text', smem).upper(), smem)
+
+
+@Registrable.register("test.counter")
+class CounterComponent(Component):
+    """Emits three batches per epoch, fails on the batch number given in the ``fail_on`` config key"""
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.local_output_names = ['batch']
+        self.epoch = -1
+        self.batch_num = 0
+
+    def forward(self, smem, add_local_mem=False):
+        if smem["epoch"] > self.epoch:
+            self.epoch, self.batch_num = smem["epoch"], 0
+        if self.batch_num == 3:
+            raise StopIteration
+        if self.batch_num == self.config.get("fail_on"):
+            raise ValueError("broken batch")
+        self.batch_num += 1
+        self.set_output('batch', (self.epoch, self.batch_num), smem)
+
+
+@Registrable.register("test.collect")
+class CollectComponent(Component):
+    def __init__(self, config):
+        super().__init__(config)
+        self.local_input_names = ['batch']
+        self.seen = []
+
+    def train(self, smem, add_local_mem=False):
+        self.seen.append(self.get_input('batch', smem))
+
+
+class TestPipeline(DPTestCase):
+
+    def _pipeline(self):
+        return init_component({
+            "pipe": [
+                {"component": "test.upper", "in": ["text"], "out": ["upper"]},
+                {"component": "test.upper", "in": ["upper"], "out": ["disabled"], "disable": True}
+            ]
+        })
+
+    def test_compile_once(self):
+        pipe = self._pipeline()
+        assert isinstance(pipe, Pipeline)
+        for text in ["cheap", "restaurant"]:
+            smem = {"text": text}
+            pipe.forward(smem)
+            assert smem["upper"] == text.upper()
+            assert "disabled" not in smem
+        assert pipe.pipeline[0].setup_calls == 1
+        assert pipe.compile() == ((pipe.pipeline[0],),)
+
+    def test_forward_batch(self):
+        pipe = self._pipeline()
+        smems = [{"text": "cheap"}, {"text": "restaurant"}]
+        pipe.forward_batch(smems)
+        assert [smem["upper"] for smem in smems] == ["CHEAP", "RESTAURANT"]
+        assert all("disabled" not in smem for smem in smems)
+
+    def test_parallel_stages(self):
+        pipe = init_component({
+            "num_workers": 2,
+            "pipe": [
+                {"component": "test.upper", "in": ["text"], "out": ["a"]},
+                {"component": "test.upper", "in": ["text"], "out": ["b"]},
+                {"component": "test.upper", "in": ["a"], "out": ["c"]},
+                {"component": "test.upper", "in": ["text"], "out": ["d"]}
+            ]
+        })
+        first, second, third, fourth = pipe.pipeline
+        assert pipe.compile() == ((first, second, fourth), (third,))
+        smem = {"text": "west"}
+        pipe.forward(smem)
+        assert smem == {"text": "west", "a": "WEST", "b": "WEST", "c": "WEST", "d": "WEST"}
+        pipe.shutdown()
+
+    def _train_pipeline(self, prefetch, **counter_config):
+        counter_config.update({"component": "test.counter", "out": ["batch"]})
+        return init_component({
+            "train": {"num_epochs": 2, "prefetch": prefetch},
+            "pipe": [
+                counter_config,
+                {"component": "test.collect", "in": ["batch"]}
+            ]
+        })
+
+    def test_train_prefetch(self):
+        expected = [(e, b) for e in range(2) for b in range(1, 4)]
+        for prefetch in [0, 2]:
+            pipe = self._train_pipeline(prefetch)
+            pipe.train({})
+            assert pipe.get_trained_component().seen == expected
+
+    def test_train_prefetch_error(self):
+        pipe = self._train_pipeline(2, fail_on=2)
+        with self.assertRaises(ValueError):
+            pipe.train({})
+        assert pipe.get_trained_component().seen == [(0, 1), (0, 2)]
@@ -0,0 +1,51 @@
+import json
+
+from deeppavlov.testing.test_case import DPTestCase
+from deeppavlov.core.components import Component, init_component
+from deeppavlov.core.registrable import Registrable
+
+
+@Registrable.register("test.reverse")
+class ReverseComponent(Component):
+    def __init__(self, config):
+        super().__init__(config)
+        self.local_input_names = ['text']
+        self.local_output_names = ['reversed']
+
+    def forward(self, smem, add_local_mem=False):
+        self.set_output('reversed', self.get_input('text', smem)[::-1], smem)
+
+
+class TestProfiling(DPTestCase):
+
+    def test_profiler(self):
+        pipe = init_component({
+            "profile": True,
+            "profile_to": self.TEST_DIR + "/profile.json",
+            "pipe": [
+                {"component": "test.reverse", "in": ["text"], "out": ["reversed"]}
+            ]
+        })
+        pipe.forward({"text": "cheap"})
+        pipe.forward_batch([{"text": "west"}, {"text": "east"}])
+
+        summary = pipe.profiler.summary()
+        stats = summary["test.reverse:reversed"]
+        assert stats["forward"]["calls"] == 1
+        assert stats["forward"]["items"] == 1
+        assert stats["forward"]["mean_payload_bytes"] == 5
+        assert stats["forward_batch"]["calls"] == 1
+        assert stats["forward_batch"]["items"] == 2
+
+        prometheus = pipe.profiler.to_prometheus()
+        assert 'deeppavlov_component_latency_seconds_count{component="test.reverse:reversed",method="forward"} 1' \
+            in prometheus
+
+        pipe.forward({"text": ["west", "east", "north"]})
+        stats = pipe.profiler.summary()["test.reverse:reversed"]
+        assert stats["forward"]["calls"] == 2
+        assert stats["forward"]["items"] == 4
+
+        pipe.shutdown()
+        with open(self.TEST_DIR + "/profile.json") as f:
+            assert json.load(f) == json.loads(pipe.profiler.to_json())
@@ -17,3 +17,46 @@ class TestRegistrable(DPTestCase):
 
         assert "dummy" in base_class.list_available()
         assert 1 == len(base_class.list_available())
+
+    def test_lazy_registration(self):
+        from deeppavlov.core.components import Component
+        from deeppavlov.core.registrable import Registrable
+
+        assert "hcn" in Registrable.list_available()
+        assert Registrable.by_name("tokenizer.chars").__name__ == "CharTokenizerComponent"
+
+        Component.register_lazy("test.lazy", "tests.common.lazy_component")
+        self.addCleanup(Registrable._lazy_registry[Component].pop, "test.lazy")
+        assert "test.lazy" in Component.list_available()
+        with self.assertRaises(ImportError):
+            Component.by_name("test.lazy")
+
+    def test_failed_lazy_import(self):
+        import importlib
+        import os
+        import sys
+        from deeppavlov.core.registrable import Registrable
+
+        with open(os.path.join(self.TEST_DIR, "broken_component.py"), "w") as f:
+            f.write("from deeppavlov.core.registrable import Registrable\n"
+                    "@Registrable.register('test.broken')\n"
+                    "class Broken(Registrable):\n"
+                    "    pass\n"
+                    "import broken_component_dependency\n")
+        sys.path.insert(0, self.TEST_DIR)
+        self.addCleanup(sys.path.remove, self.TEST_DIR)
+        self.addCleanup(sys.modules.pop, "broken_component", None)
+        self.addCleanup(Registrable._registry[Registrable].pop, "test.broken", None)
+        Registrable.register_lazy("test.broken", "broken_component")
+        self.addCleanup(Registrable._lazy_registry[Registrable].pop, "test.broken")
+
+        for _ in range(2):
+            with self.assertRaises(ImportError):
+                Registrable.by_name("test.broken")
+            assert "test.broken" not in Registrable._registry[Registrable]
+
+        # the module is registered when its import succeeds
+        open(os.path.join(self.TEST_DIR, "broken_component_dependency.py"), "w").close()
+        self.addCleanup(sys.modules.pop, "broken_component_dependency", None)
+        importlib.invalidate_caches()
+        assert Registrable.by_name("test.broken").__name__ == "Broken"
@@ -0,0 +1,123 @@
+import asyncio
+import json
+
+import numpy as np
+from scipy import sparse
+
+from deeppavlov.testing.test_case import DPTestCase
+from deeppavlov.core.server import MicroBatcher, InferenceServer
+
+
+class UpperPipeline:
+    def __init__(self):
+        self.batch_sizes = []
+
+    def forward(self, smem, add_local_mem=False):
+        self.forward_batch([smem])
+
+    def forward_batch(self, smems, add_local_mem=False):
+        self.batch_sizes.append(len(smems))
+        for smem in smems:
+            smem["upper"] = smem["text"].upper()
+
+
+class OutputsPipeline:
+    def forward_batch(self, smems, add_local_mem=False):
+        for smem in smems:
+            smem["bow"] = sparse.csr_matrix(np.array([[0, 1, 0]]))
+            if smem.get("object"):
+                smem["object"] = object()
+
+
+class TestServer(DPTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        # Cleanups run in reverse order, the loop is closed after the servers of the test are stopped
+        self.addCleanup(self.loop.close)
+
+    def test_micro_batching(self):
+        pipeline = UpperPipeline()
+        batcher = MicroBatcher(pipeline, max_batch_size=4, max_wait=0.05).start()
+        texts = ["text %s" % i for i in range(10)]
+        results = self.loop.run_until_complete(
+            asyncio.gather(*[batcher.submit({"text": t}) for t in texts]))
+        batcher.stop()
+        assert [r["upper"] for r in results] == [t.upper() for t in texts]
+        assert sum(pipeline.batch_sizes) == 10
+        assert max(pipeline.batch_sizes) <= 4
+        assert len(pipeline.batch_sizes) < 10
+
+    def test_failed_request(self):
+        pipeline = UpperPipeline()
+        batcher = MicroBatcher(pipeline, max_batch_size=4, max_wait=0.05).start()
+
+        async def submit(smem):
+            try:
+                return await batcher.submit(smem)
+            except KeyError as e:
+                return e
+
+        results = self.loop.run_until_complete(
+            asyncio.gather(*[submit(smem) for smem in [{"text": "a"}, {}, {"text": "b"}]]))
+        batcher.stop()
+        assert results[0] == {"text": "a", "upper": "A"} and results[2] == {"text": "b", "upper": "B"}
+        assert isinstance(results[1], KeyError)
+        assert pipeline.batch_sizes == [3, 1, 1, 1]
+
+    def _request(self, port, data):
+        async def send():
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(data)
+            writer.write_eof()
+            response = await reader.read()
+            writer.close()
+            return response
+
+        head, body = self.loop.run_until_complete(send()).split(b'\r\n\r\n', 1)
+        return head.split(b' ')[1].decode(), json.loads(body.decode('utf-8'))
+
+    def _serve(self, pipeline, out_keys=None):
+        batcher = MicroBatcher(pipeline, max_batch_size=4, max_wait=0.01).start()
+        server = InferenceServer(batcher, out_keys=out_keys)
+        http = self.loop.run_until_complete(asyncio.start_server(server.handle, '127.0.0.1', 0))
+
+        def stop():
+            http.close()
+            self.loop.run_until_complete(http.wait_closed())
+            batcher.stop()
+
+        self.addCleanup(stop)
+        return http.sockets[0].getsockname()[1]
+
+    def test_http_outputs(self):
+        port = self._serve(OutputsPipeline())
+
+        def request(payload):
+            body = json.dumps(payload).encode('utf-8')
+            return self._request(port, b'POST / HTTP/1.1\r\nContent-Length: %d\r\n\r\n' % len(body) + body)
+
+        assert request({"text": "a"}) == ("200", {"text": "a", "bow": [[0, 1, 0]]})
+        status, payload = request({"text": "a", "object": True})
+        assert status == "500" and "not serializable" in payload["error"]
+
+    def test_http(self):
+        port = self._serve(UpperPipeline(), out_keys=["upper"])
+
+        def request(payload, content_length=None):
+            body = json.dumps(payload).encode('utf-8')
+            content_length = str(len(body)) if content_length is None else content_length
+            return self._request(port, b'POST / HTTP/1.1\r\nContent-Length: ' + content_length.encode() +
+                                 b'\r\n\r\n' + body)
+
+        assert request({"text": "west"}) == ("200", {"upper": "WEST"})
+        assert request([{"text": "a"}, {"text": "b"}]) == \
+            ("200", [{"upper": "A"}, {"upper": "B"}])
+        assert request([{"text": "a"}, "b"])[0] == "400"
+        assert request(42)[0] == "400"
+        assert request({"text": "a"}, content_length="abc")[0] == "400"
+        assert request({"text": "a"}, content_length="-1")[0] == "400"
+        assert request({"text": "a"}, content_length="100")[0] == "400"
+        assert self._request(port, b'\r\n\r\n')[0] == "400"
@@ -0,0 +1,33 @@
+from deeppavlov.testing.test_case import DPTestCase
+from deeppavlov.preprocessing.tokenizers import SpacyTokenizerComponent, get_nlp
+
+
+class TestSpacyTokenizer(DPTestCase):
+
+    def _tokenizer(self, **config):
+        config.update({"component": "tokenizer.spacy", "in": ["text"], "out": ["tokens"], "blank": True})
+        return SpacyTokenizerComponent(config)
+
+    def test_lazy_model(self):
+        assert get_nlp(blank=True) is get_nlp(blank=True)
+
+    def test_batch(self):
+        texts = ["i'm looking for cheap food.", "west part of town, please"] * 5
+        expected = [["i", "'m", "looking", "for", "cheap", "food", "."],
+                    ["west", "part", "of", "town", ",", "please"]] * 5
+
+        tokenizer = self._tokenizer()
+        smem = {"text": texts[0]}
+        tokenizer.forward(smem)
+        assert smem["tokens"] == expected[0]
+
+        smems = [{"text": text} for text in texts]
+        tokenizer.forward_batch(smems)
+        assert [smem["tokens"] for smem in smems] == expected
+
+        for n_process in [1, 2]:
+            tokenizer = self._tokenizer(batch=True, batch_size=3, n_process=n_process)
+            smem = {"text": texts}
+            tokenizer.forward(smem)
+            assert smem["tokens"] == expected
+            tokenizer.shutdown()
@@ -1,5 +1,6 @@
 from deeppavlov.testing.test_case import DPTestCase
 from deeppavlov.core.components import read_configuration, init_component, load_cls, TrainPipeline
+from deeppavlov.core.utils import LRUCache
 
 
 class TestUtils(DPTestCase):
@@ -13,3 +14,13 @@ class TestUtils(DPTestCase):
         cmp = init_component(cfg)
         assert isinstance(cmp, TrainPipeline)
 
+    def test_lru_cache(self):
+        cache = LRUCache(2)
+        cache["cheap"] = 1
+        cache["west"] = 2
+        assert cache.get("cheap") == 1
+        cache["town"] = 3
+        assert "west" not in cache
+        assert cache.get("west") is None
+        assert len(cache) == 2
+        assert cache.stats() == {"size": 2, "max_size": 2, "hits": 1, "misses": 1, "evictions": 1, "hit_rate": 0.5}
@@ -0,0 +1,48 @@
+import numpy as np
+
+from deeppavlov.testing.test_case import DPTestCase
+from deeppavlov.core.vocab import Vocabulary, BowComponent
+
+
+class TestVocabulary(DPTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.vocab = Vocabulary([['cheap', 'restaurant'], ['west', 'of', 'the', 'town']],
+                                special_tokens=('<UNK>', '<PAD>'))
+
+    def test_lookup(self):
+        assert len(self.vocab) == 8
+        assert self.vocab.tok2idx('cheap') == 2
+        assert self.vocab.tok2idx('moscow') == 0
+        assert 'moscow' not in self.vocab
+        assert len(self.vocab._t2i) == 8
+        assert self.vocab.process([['cheap', 'moscow'], ['town']]) == [[2, 0], [7]]
+
+    def test_encode_decode_batch(self):
+        batch, lengths = self.vocab.encode_batch([['cheap', 'restaurant', 'moscow'], [], ['town']])
+        assert batch.dtype == np.int32
+        assert lengths.tolist() == [3, 0, 1]
+        assert batch.tolist() == [[2, 3, 0], [1, 1, 1], [7, 1, 1]]
+        assert self.vocab.decode_batch(batch, lengths) == [['cheap', 'restaurant', '<UNK>'], [], ['town']]
+        assert self.vocab.decode_batch(batch)[2] == ['town', '<PAD>', '<PAD>']
+
+    def test_save_load(self):
+        path = self.TEST_DIR + "/vocab.txt"
+        self.vocab.save(path)
+        assert Vocabulary(dict_file_path=path)._i2t == self.vocab._i2t
+
+    def test_sparse_bow(self):
+        dense = BowComponent({"in": ["tokens"], "out": ["bow"]})
+        sparse = BowComponent({"in": ["tokens"], "out": ["bow"], "sparse": True})
+        dense.vocab = sparse.vocab = self.vocab
+
+        tokens_batch = [['cheap', 'cheap', 'moscow', 'town'], []]
+        smems = [{"tokens": tokens} for tokens in tokens_batch]
+        sparse.forward_batch(smems)
+        for tokens, smem in zip(tokens_batch, smems):
+            single = {"tokens": tokens}
+            dense.forward(single)
+            assert single["bow"].tolist() == smem["bow"].toarray()[0].tolist()
+        assert smems[0]["bow"].nnz == 2
+        assert smems[0]["bow"][0, 2] == 2
@@ -1,6 +1,11 @@
+import os
+
 from deeppavlov.testing.test_case import DPTestCase
 from deeppavlov.data.dstc2 import DSTC2Reader, DSTC2NerProvider, DSTC2DialogProvider, DSTC2IntentsProvider
+from deeppavlov.data.dstc2 import DSTC2DialogStream
+from deeppavlov.data.utils import mark_done
 from deeppavlov.core.registrable import Registrable
+from deeppavlov.core.components import DatasetProviderWrapper
 
 
 class TestDSTC2(DPTestCase):
@@ -69,3 +74,33 @@ class TestDSTC2(DPTestCase):
             "intents": [['inform_food']]
         }
 
+    def test_dstc2_stream(self):
+        data_path = os.path.join(self.TEST_DIR, 'stream')
+        os.makedirs(os.path.join(data_path, 'dstc2'))
+        with open(os.path.join(data_path, 'dstc2', 'dstc2-trn.jsonlist'), 'w') as f:
+            f.write('{"index": 0, "text": "Hello", "dialog_acts": [{"act": "welcomemsg", "slots": []}]}\n'
+                    '{"index": 0, "text": "cheap", "goals": {}, "dialog_acts": [], "db_result": null}\n'
+                    '\n'
+                    '{"index": 0, "text": "Hi", "dialog_acts": [{"act": "welcomemsg", "slots": []}]}\n'
+                    '{"index": 0, "text": "bye", "goals": {}, "dialog_acts": []}\n'
+                    '\n')
+        mark_done(os.path.join(data_path, 'dstc2'))
+
+        stream = DSTC2Reader.read(data_path, stream=True)
+        assert isinstance(stream["train"], DSTC2DialogStream)
+        data = DSTC2Reader.read(data_path)
+        assert list(stream["train"]) == data["train"]
+        assert len(data["train"]) == 2
+
+        provider = DSTC2DialogProvider(stream, 1)
+        batches = list(provider.batch_generator(1))
+        assert batches == list(DSTC2DialogProvider(data, 1).batch_generator(1))
+        assert batches == list(provider.batch_generator(1))
+        assert batches[1] == {"text": "bye", "response": "Hi", "other": {'act': 'welcomemsg', 'episode_done': True}}
+
+        config = {"reader": "deeppavlov.data.dstc2.DSTC2Reader", "data_path": data_path, "stream": True, "out": []}
+        wrapper = DatasetProviderWrapper(dict(config, provider=DSTC2DialogProvider))
+        assert list(wrapper.provider.batch_generator(1)) == batches
+        for provider_cls in [DSTC2NerProvider, DSTC2IntentsProvider]:
+            with self.assertRaises(ValueError):
+                DatasetProviderWrapper(dict(config, provider=provider_cls))
@@ -0,0 +1,23 @@
+from deeppavlov.testing.test_case import DPTestCase
+from deeppavlov.data.gazetteer import Gazetteer
+
+
+class TestGazetteer(DPTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.gazetteer = Gazetteer.from_slot_vals({
+            "area": {"west": ["west", "west part"], "centre": ["centre", "city centre"]},
+            "food": {"chinese": ["chinese"]}
+        })
+
+    def test_longest_match(self):
+        tokens = "cheap chinese in the west part of city centre".split()
+        assert self.gazetteer.matches(tokens) == [(1, 2, "food", "chinese"), (4, 6, "area", "west"),
+                                                  (7, 9, "area", "centre")]
+        assert self.gazetteer.tag(tokens) == ['O', 'B-food', 'O', 'O', 'B-area', 'I-area', 'O', 'B-area', 'I-area']
+
+    def test_allowed_and_end(self):
+        tokens = "chinese food in the west".split()
+        assert self.gazetteer.tag(tokens, allowed={("area", "west")}) == ['O', 'O', 'O', 'O', 'B-area']
+        assert self.gazetteer.tag(tokens, end=len(tokens) - 1) == ['B-food', 'O', 'O', 'O', 'O']
@@ -0,0 +1,45 @@
+import random
+import re
+
+from deeppavlov.testing.test_case import DPTestCase
+from deeppavlov.data.utils import TextNormalizer, simple_prep
+
+
+def reference_simple_prep(data):
+    """Rule by rule implementation of simple_prep"""
+    f = [x.lower() for x in data]
+    for old, new in [("\\n", " "), ("\\t", " "), ("\\xa0", " "), ("\\xc2", " ")]:
+        f = [x.replace(old, new) for x in f]
+    for pattern, repl in [('!!+', ' !! '), ('!', ' ! '), ('! !', '!!'),
+                          (r'\?\?+', ' ?? '), (r'\?', ' ? '), (r'\? \?', '??'), (r'\?!+', ' ?! '),
+                          (r'\.\.+', '..'), (r'\.', ' . '), (r'\.  \.', '..'),
+                          (',', ' , '), (':', ' : '), (';', ' ; '), (r'\%', ' % ')]:
+        f = [re.sub(pattern, repl, x) for x in f]
+    for old, new in [("won't", "will not"), ("can't", "cannot"), ("i'm", "i am"), (" im ", " i am "),
+                     ("you're ", "you are"), ("'re", " are"), ("ain't", "is not"), ("'ll", " will"),
+                     ("'t", " not"), ("'ve", " have"), ("'s", " is"), ("'re", " are"), ("'d", " would")]:
+        f = [x.replace(old, new) for x in f]
+    f = [re.sub("ies( |$)", "y ", x) for x in f]
+    f = [re.sub("s( |$)", " ", x) for x in f]
+    f = [re.sub("ing( |$)", " ", x) for x in f]
+    f = [x.replace("tard ", " ") for x in f]
+    for pattern, repl in [(" [*$%&#@][*$%&#@]+", " xexp "), (" [0-9]+ ", " DD "), (r"<\S*>", ""), (r'\s+', ' ')]:
+        f = [re.sub(pattern, repl, x) for x in f]
+    return f
+
+
+class TestTextNormalizer(DPTestCase):
+
+    def test_simple_prep_equivalence(self):
+        pieces = ["won't", "can't", "i'm", " im ", "you're ", "'re", "ain't", "'ll", "'t", "'ve", "'s", "'d",
+                  "!", "?", ".", ",", ":", ";", "%", " ", "  ", "\\n", "\\t", "\\xa0", "\\xc2", "ies", "ing",
+                  "tard ", "s", "<b>", "$$", "@#", "42", "I", "M", "Cheap", "you", "re", "'", "a", "n", "t"]
+        rs = random.Random(1)
+        texts = ["".join(rs.choice(pieces) for _ in range(rs.randint(0, 20))) for _ in range(20000)]
+        assert simple_prep(texts) == reference_simple_prep(texts)
+
+    def test_merge(self):
+        normalizer = TextNormalizer([("a", "b", False), ("c", "d", False), ("b", "e", False)], lower=False)
+        # "b" can be created by the first rule, so it is applied separately
+        assert len(normalizer.passes) == 2
+        assert list(normalizer.stream(iter(["abc", "cab"]))) == ["eed", "dee"]
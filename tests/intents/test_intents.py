@@ -0,0 +1,41 @@
+import numpy as np
+
+from deeppavlov.testing.test_case import DPTestCase
+from deeppavlov.intents.intents import IntentsComponent
+
+
+class LengthModel:
+    """Predicts the length of every text, counts model calls"""
+
+    def __init__(self):
+        self.calls = []
+
+    def infer(self, data):
+        self.calls.append(list(data))
+        return np.array([[len(text)] for text in data], dtype=np.float32)
+
+
+class TestIntentsComponent(DPTestCase):
+
+    def _component(self):
+        cmp = IntentsComponent({"in": ["tokens"], "out": ["intents"]})
+        cmp.model = LengthModel()
+        return cmp
+
+    def test_forward_batch(self):
+        inputs = [["cheap", "restaurant"], "west", [], ["bye"]]
+
+        cmp = self._component()
+        expected = []
+        for tokens in inputs:
+            smem = {"tokens": tokens}
+            cmp.forward(smem)
+            expected.append(smem["intents"])
+
+        cmp = self._component()
+        smems = [{"tokens": tokens} for tokens in inputs]
+        cmp.forward_batch(smems)
+        assert len(cmp.model.calls) == 1
+        for smem, prediction in zip(smems, expected):
+            assert smem["intents"].tolist() == prediction.tolist()
+        assert [smem["intents"].shape[0] for smem in smems] == [2, 1, 1, 1]
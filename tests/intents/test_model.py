@@ -0,0 +1,83 @@
+import os
+from unittest import mock
+
+import numpy as np
+
+from deeppavlov.testing.test_case import DPTestCase
+from deeppavlov.intents import emb
+from deeppavlov.intents.model import KerasMulticlassModel
+
+
+class StubFastText:
+    """Vectors of known words, KeyError for the others as gensim raises when no n-grams are known"""
+
+    def __init__(self, words, dim):
+        rng = np.random.RandomState(0)
+        self.vectors = {word: rng.randn(dim).astype(np.float32) for word in words}
+
+    def __getitem__(self, word):
+        return self.vectors[word]
+
+
+def texts2vec_reference(fasttext_model, sentences, text_size, embedding_size):
+    # Per-token construction of KerasMulticlassModel.texts2vec before vectorization
+    embeddings_batch = []
+    for sen in sentences:
+        embeddings = []
+        tokens = sen.split(' ')
+        tokens = [el for el in tokens if el != '']
+        if len(tokens) > text_size:
+            tokens = tokens[:text_size]
+        for tok in tokens:
+            embeddings.append(fasttext_model.infer(tok))
+        if len(tokens) < text_size:
+            pads = [np.zeros(embedding_size) for _ in range(text_size - len(tokens))]
+            embeddings = pads + embeddings
+        embeddings_batch.append(np.asarray(embeddings))
+    return np.asarray(embeddings_batch)
+
+
+class TestTexts2Vec(DPTestCase):
+
+    def _fasttext_model(self, cache_size=100000):
+        path = os.path.join(self.TEST_DIR, "fasttext.bin")
+        open(path, "w").close()
+        stub = StubFastText(["cheap", "restaurant", "west", "part", "town", "bye"], 4)
+        with mock.patch.object(emb.FastText, "load_fasttext_format", return_value=stub):
+            return emb.EmbeddingInferableModel(embedding_dim=4, embedding_fname=path, cache_size=cache_size)
+
+    def _model(self, text_size):
+        model = KerasMulticlassModel.__new__(KerasMulticlassModel)
+        model.opt = {"text_size": text_size, "embedding_size": 4}
+        model.fasttext_model = self._fasttext_model()
+        return model
+
+    def test_texts2vec(self):
+        sentences = ["cheap restaurant",
+                     "",
+                     "   ",
+                     "west  part of town please bye",
+                     "bye bye bye",
+                     "moscow cheap moscow",
+                     "cheap restaurant in the west part"]
+        model = self._model(text_size=5)
+        expected = texts2vec_reference(self._fasttext_model(), sentences, 5, 4)
+
+        features = model.texts2vec(sentences)
+        assert features.dtype == np.float32 and features.shape == (len(sentences), 5, 4)
+        assert np.array_equal(features, expected.astype(np.float32))
+
+    def test_empty_texts(self):
+        model = self._model(text_size=3)
+        assert np.array_equal(model.texts2vec(["", " "]), np.zeros([2, 3, 4], dtype=np.float32))
+        assert model.texts2vec([]).shape == (0, 3, 4)
+
+    def test_embed_tokens(self):
+        fasttext_model = self._fasttext_model(cache_size=2)
+        tokens = ["cheap", "moscow", "cheap", "town", "west", "cheap"]
+        embeddings = fasttext_model.embed_tokens(tokens)
+        assert embeddings.dtype == np.float32 and embeddings.shape == (6, 4)
+        for tok, embedding in zip(tokens, embeddings):
+            assert np.array_equal(embedding, fasttext_model.infer(tok))
+        assert not embeddings[1].any()
+        assert fasttext_model.embed_tokens([]).shape == (0, 4)
@@ -0,0 +1,77 @@
+import json
+import os
+import subprocess
+import sys
+
+from deeppavlov.testing.test_case import DPTestCase
+from deeppavlov.core.components import Component, init_component
+from deeppavlov.core.registrable import Registrable
+
+
+class FakeNetwork:
+    def __init__(self):
+        self.calls = []
+
+    def infer(self, tokens_batch, chars_batch):
+        self.calls.append(tokens_batch)
+        return [['B-name'] * len(tokens) for tokens in tokens_batch]
+
+
+@Registrable.register("test.fake_ner")
+class FakeNerComponent(Component):
+    def __init__(self, config):
+        super().__init__(config)
+        self.network = FakeNetwork()
+
+
+class TestGazetteerNer(DPTestCase):
+
+    def _component(self, **config):
+        slot_values = os.path.join(self.TEST_DIR, "slot_vals.json")
+        with open(slot_values, "w") as f:
+            json.dump({"area": {"west": ["west", "west part"]}, "food": {"thai": ["thai"]}}, f)
+        config.update({"component": "ner.gazetteer", "slot_values": slot_values,
+                       "in": ["tokens", "chars"], "out": ["tags"]})
+        cmp = init_component(config)
+        cmp.setup()
+        return cmp
+
+    def test_gazetteer(self):
+        cmp = self._component()
+        smem = {"tokens": ["thai", "food", "in", "the", "west", "part"], "chars": []}
+        cmp.forward(smem)
+        assert smem["tags"] == [['B-food', 'O', 'O', 'O', 'B-area', 'I-area']]
+
+        # Same result for an empty utterance as from NerComponent
+        smem = {"tokens": [], "chars": []}
+        cmp.forward(smem)
+        assert smem["tags"] is None
+
+    def test_fallback(self):
+        cmp = self._component(init={"fallback": {"component": "test.fake_ner"}})
+        smems = [{"tokens": ["thai", "food"], "chars": []},
+                 {"tokens": ["the", "golden", "wok"], "chars": []},
+                 {"tokens": [], "chars": []}]
+        cmp.forward_batch(smems)
+        assert [smem["tags"] for smem in smems] == [[['B-food', 'O']], [['B-name', 'B-name', 'B-name']], None]
+        assert cmp._fallback_network().calls == [[["the", "golden", "wok"]]]
+
+    def test_no_tensorflow(self):
+        slot_values = os.path.join(self.TEST_DIR, "slot_vals.json")
+        with open(slot_values, "w") as f:
+            json.dump({"area": {"west": ["west"]}}, f)
+        # A fresh interpreter, tensorflow may be already imported by other tests
+        script = "\n".join([
+            "import sys",
+            "from deeppavlov.core.components import Pipeline",
+            "pipe = Pipeline({'pipe': [",
+            "    {'component': 'tokenizer.chars', 'in': ['tokens'], 'out': ['chars']},",
+            "    {'component': 'ner.gazetteer', 'slot_values': sys.argv[1], 'in': ['tokens', 'chars'], 'out': ['tags']}]})",
+            "pipe.setup()",
+            "smem = {'tokens': ['west']}",
+            "pipe.forward(smem)",
+            "assert smem['tags'] == [['B-area']], smem",
+            "assert 'tensorflow' not in sys.modules"])
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        env = dict(os.environ, PYTHONPATH=root)
+        subprocess.check_call([sys.executable, "-c", script, slot_values], env=env)
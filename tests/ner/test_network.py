@@ -0,0 +1,62 @@
+import numpy as np
+import tensorflow as tf
+
+from deeppavlov.testing.test_case import DPTestCase
+from deeppavlov.core.vocab import Vocabulary
+from deeppavlov.ner.network import NerNetwork, viterbi_decode_batch
+
+
+class TestNerNetwork(DPTestCase):
+
+    def test_viterbi_decode_batch(self):
+        rs = np.random.RandomState(42)
+        logits = rs.randn(4, 7, 5).astype(np.float32)
+        transition_params = rs.randn(5, 5).astype(np.float32)
+        sequence_lengths = np.array([7, 3, 1, 5], dtype=np.float32)
+
+        decoded = viterbi_decode_batch(logits, transition_params, sequence_lengths)
+
+        for logit, length, tags in zip(logits, sequence_lengths, decoded):
+            expected, _ = tf.contrib.crf.viterbi_decode(logit[:int(length)], transition_params)
+            assert tags == list(expected)
+
+        padded = viterbi_decode_batch(logits, transition_params, sequence_lengths, padded=True)
+        assert padded.shape == (4, 7)
+        assert [row[:int(length)].tolist() for row, length in zip(padded, sequence_lengths)] == decoded
+
+    def _network(self):
+        network = NerNetwork.__new__(NerNetwork)
+        network.tokens_vocab = Vocabulary(['<PAD>', 'cheap', 'west', 'town', 'food'])
+        network.chars_vocab = Vocabulary(['<PAD>'] + list('cheapwstown'))
+        network.tags_vocab = Vocabulary(['O', 'B-area', 'B-food'])
+        return network
+
+    def test_prepare_batch(self):
+        network = self._network()
+        tokens = [['cheap', 'moscow', 'town'], ['west']]
+        chars = [[list(token) for token in utterance] for utterance in tokens]
+        tags = [['O', 'O', 'B-area'], ['B-area']]
+
+        tokens_np, chars_np, mask_np, tags_np = network._prepare_batch(tokens, chars, tags)
+
+        assert tokens_np.dtype == np.int32 and tokens_np.tolist() == [[1, 0, 3], [2, 0, 0]]
+        assert mask_np.tolist() == [[1, 1, 1], [1, 0, 0]]
+        assert tags_np.tolist() == [[0, 0, 1], [1, 0, 0]]
+        assert chars_np.shape == (2, 3, 6)
+        for n, utterance in enumerate(chars):
+            for k, token_chars in enumerate(utterance):
+                assert chars_np[n, k].tolist() == network.chars_vocab.toks2idxs(token_chars) + \
+                    [0] * (6 - len(token_chars))
+        assert not chars_np[1, 1:].any()
+        assert network._prepare_batch([[], []], [[], []]) == (None, None, None, None)
+        assert network._prepare_batch([], []) == (None, None, None, None)
+
+    def test_infer(self):
+        network = self._network()
+        # tag of every token is its index modulo the number of tags, padding is tagged as well
+        network.predict = lambda x_word, x_char: x_word % 3
+
+        tokens = [['cheap', 'west', 'food'], [], ['town']]
+        chars = [[list(token) for token in utterance] for utterance in tokens]
+        assert network.infer(tokens, chars) == [['B-area', 'B-food', 'B-area'], [], ['O']]
+        assert network.infer([[]], [[]]) is None
@@ -0,0 +1,28 @@
+import numpy as np
+
+from deeppavlov.testing.test_case import DPTestCase
+from deeppavlov.skills.network import HybridCodeNetworkModel
+
+
+class TestHybridCodeNetworkModel(DPTestCase):
+
+    def test_train_on_dialogs(self):
+        model = HybridCodeNetworkModel({'learning_rate': 0.1, 'hidden_dim': 8, 'action_size': 5, 'obs_size': 6,
+                                        'train_now': True})
+        rs = np.random.RandomState(0)
+        dialogs = [[(rs.randn(6).astype(np.float32), rs.randint(5)) for _ in range(length)] for length in [3, 1, 4]]
+
+        # loss of the single turn graph, the LSTM state is carried between turns of a dialog
+        losses = []
+        for dialog in dialogs:
+            model.reset_state()
+            for features, action in dialog:
+                loss, model.state_c, model.state_h = model.sess.run(
+                    [model._loss, model._next_state.c, model._next_state.h],
+                    feed_dict={model._features: features[np.newaxis], model._action: [action],
+                               model._state_c: model.state_c, model._state_h: model.state_h})
+                losses.append(loss[0])
+
+        assert np.isclose(model.train_on_dialogs(dialogs), np.mean(losses), atol=1e-5)
+        assert model.train_on_dialogs(dialogs) < np.mean(losses)
+        model.shutdown()
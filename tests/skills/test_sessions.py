@@ -0,0 +1,113 @@
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+from deeppavlov.testing.test_case import DPTestCase
+from deeppavlov.skills.hcn import HybridCodeNetworkBot, HcnComponent
+from deeppavlov.skills.sessions import DialogState, SessionStore, SQLiteSessionStore, session_backend
+
+
+class TestSessions(DPTestCase):
+
+    def _bot(self):
+        template_path = os.path.join(self.TEST_DIR, "templates.txt")
+        with open(template_path, "w") as f:
+            f.write("bye\tGoodbye.\tGoodbye.\n"
+                    "request_area\tWhat part of town?\tWhat part of town?\n"
+                    "welcomemsg\tHello!\tHello!\n")
+        return HybridCodeNetworkBot({
+            "use_action_mask": False, "slot_names": ["area", "food"], "template_path": template_path,
+            "learning_rate": 0.1, "hidden_dim": 8, "action_size": 3, "intents_size": 2, "train_now": True,
+            # bow + emb + intents + tracker + context + previous action
+            "obs_size": 4 + 2 + 2 + 6 + 2 + 3
+        })
+
+    def test_session_store(self):
+        store = SessionStore(ttl=0.05)
+        store.put("a", 1)
+        assert store.get("a") == 1 and store.get("b") is None
+        time.sleep(0.1)
+        assert store.get("a") is None and len(store) == 0
+
+    def test_infer_sessions(self):
+        bot = self._bot()
+        rs = np.random.RandomState(3)
+
+        def turn():
+            return rs.rand(4).astype(np.float32), rs.rand(2), [("area", "west")], rs.rand(2)
+
+        conversations = {"a": [turn() for _ in range(3)], "b": [turn() for _ in range(2)]}
+
+        expected, expected_states = {}, {}
+        for session_id, turns in conversations.items():
+            bot.set_state(bot.initial_state())
+            expected[session_id] = [bot.infer_on_batch(*t) for t in turns]
+            expected_states[session_id] = bot.get_state()
+        bot.set_state(bot.initial_state())
+
+        predicted = {"a": [], "b": []}
+        for step in range(3):
+            session_ids = [s for s in ["a", "b"] if step < len(conversations[s])]
+            turns = [conversations[s][step] for s in session_ids]
+            for session_id, pred_id in zip(session_ids, bot.infer_sessions(session_ids, *zip(*turns))):
+                predicted[session_id].append(pred_id)
+
+        assert predicted == expected
+        for session_id, state in expected_states.items():
+            assert np.allclose(bot.sessions.get(session_id).state_h, state.state_h, atol=1e-6)
+            assert np.array_equal(bot.sessions.get(session_id).prev_action, state.prev_action)
+        assert bot.sessions.get("a").history == [("area", "west")] * 3
+        assert not bot.tracker.history
+        with self.assertRaises(ValueError):
+            bot.infer_sessions(["a", "a"], *zip(turn(), turn()))
+        bot.shutdown()
+
+    def test_state_snapshot(self):
+        bot = self._bot()
+        state = bot.initial_state()
+        state.history = [("area", "west"), ("food", "thai")]
+        state.db_result = {"name": "bangkok city"}
+        state.prev_action[2] = 1.
+        state.state_c = np.arange(8, dtype=np.float32) / 3.
+
+        restored = DialogState.deserialize(state.serialize())
+        assert restored.history == state.history and restored.db_result == state.db_result
+        assert np.array_equal(restored.prev_action, state.prev_action)
+        assert np.array_equal(restored.state_c, state.state_c) and np.array_equal(restored.state_h, state.state_h)
+        bot.shutdown()
+
+    def test_sqlite_backend(self):
+        path = os.path.join(self.TEST_DIR, "sessions.db")
+        store = session_backend({"backend": "sqlite", "path": path, "ttl": 0.05})
+        assert isinstance(store, SQLiteSessionStore)
+        state = DialogState.initial(3, 4)
+        state.history = [("area", "west")]
+        store.put(1, state)
+
+        # another worker continues the conversation
+        other = SQLiteSessionStore(path, ttl=0.05)
+        assert other.get(1).history == [("area", "west")]
+        other.delete(1)
+        assert store.get(1) is None
+
+        store.put(2, state)
+        time.sleep(0.1)
+        assert other.get(2) is None
+
+        plan = other._connection.execute("EXPLAIN QUERY PLAN DELETE FROM sessions WHERE accessed < 0").fetchall()
+        assert any("sessions_accessed" in row[-1] for row in plan)
+        store.close()
+        other.close()
+
+    def test_component_shutdown(self):
+        path = os.path.join(self.TEST_DIR, "sessions.db")
+        cmp = HcnComponent({"in": [], "out": []})
+        cmp.shutdown()
+        cmp.hcn = self._bot()
+        cmp.hcn.sessions = session_backend({"backend": "sqlite", "path": path})
+        cmp.shutdown()
+        # the store is closed
+        with self.assertRaises(sqlite3.ProgrammingError):
+            cmp.hcn.sessions.get(1)